@@ -2,7 +2,6 @@ import cv2
 import numpy as np
 import math
 import sys
-import tensorflow as tf
 
 # Camera parameter constants: will change based on the camera you're using
 K: np.array = np.array([[1397.52735, 0, 652.871905], [0, 1397.20119, 332.295815], [0, 0, 1]], dtype=float)
@@ -21,63 +20,197 @@ LETTER_OFFSETS: np.array = np.array([(2.0, -1.0, 0), (4.5, -1.0, 0), (6.25, -1.0
 LETTER_SIZE: float = 1.8 #in
 DIGIT_COORDS: np.array = np.array([(0, 0, 0), (LETTER_SIZE, 0, 0), (LETTER_SIZE, LETTER_SIZE, 0), (0, LETTER_SIZE, 0)], dtype=float)
 
+# Tracking constants: the search region around the last marker is padded by this fraction of the marker's size on every side
+TRACK_MARGIN: float = 0.5
+
 # Letter dictionary to convert from predictions to letters
 LETTER_DICT: dict = {1: 'A', 2: 'B', 3: 'C', 4: 'D', 5: 'E', 6: 'F', 7: 'G', 8: 'H'}
 
+# Size of the image each letter/digit is first extracted into
+DIGIT_SHAPE: tuple = (128, 128)
+
+# What each whiteboard character (by extract_digit index) is, for messages to the player
+CHARACTER_NAMES: tuple = ('start square letter', 'start square digit', 'end square letter', 'end square digit')
+
+# Bottom row of every homogeneous transform
+LAST_ROW: np.array = np.array([0, 0, 0, 1], dtype=float).reshape((1, 4))
+
+
+class SceneGeometry:
+    # Everything about the scene that doesn't change from frame to frame, worked out once
+    # The board and letter corners are stored already transformed into the marker's frame (homogeneous, one column per point),
+    # so each frame only has to move them into the camera's frame with H_cm and project them
 
-def project_board(bgr_img: np.array, board_img: np.array) -> tuple((np.array, np.array, bool)):
+    def __init__(self, camera_matrix: np.array = K, dist_coeffs: np.array = DIST_COEFFS,
+                 offset: np.array = OFFSET, letter_offsets: np.array = LETTER_OFFSETS):
+        # Inputs:
+        #   camera_matrix, dist_coeffs: The camera calibration
+        #   offset: Where the board's corner sits relative to the marker
+        #   letter_offsets: Where each letter/digit sits relative to the marker
+        self.camera_matrix: np.array = camera_matrix
+        self.dist_coeffs: np.array = dist_coeffs
+
+        # The board is turned a quarter turn from the marker and offset from it
+        R_mo, _ = cv2.Rodrigues(np.array([0, 0, -math.pi/2], dtype=float))
+        H_mo = np.concatenate((np.concatenate((R_mo, offset.reshape((1, 3)).T), axis=1), LAST_ROW), axis=0)
+        self.board_corners: np.array = np.matmul(H_mo, self.homogeneous(WORLD_COORDS))
+
+        # The letters are only offset from the marker
+        self.letter_corners: list = [self.homogeneous(DIGIT_COORDS + letter_offset) for letter_offset in letter_offsets]
+
+        # Corners of the image each letter is extracted into, and of each board image size seen so far
+        self.board_corner_pts: dict = {}
+        self.output_pts: np.array = np.array([(0, 0), (0, DIGIT_SHAPE[0]), (DIGIT_SHAPE[1], DIGIT_SHAPE[0]), (DIGIT_SHAPE[1], 0)], dtype=float)
+
+        # The points handed to cv2.projectPoints are already in the camera's frame
+        self.zero_vec: np.array = np.zeros(3, dtype=float)
+
+    def board_pts(self, board_shape: tuple) -> np.array:
+        # Returns the corners of a board image of the given shape, so that the entire image is projected
+        board_shape = tuple(board_shape[:2])
+        if board_shape not in self.board_corner_pts:
+            self.board_corner_pts[board_shape] = np.array([(board_shape[1], board_shape[0]), (0, board_shape[0]), (0, 0), (board_shape[1], 0)], dtype=float)
+        return self.board_corner_pts[board_shape]
+
+    @staticmethod
+    def homogeneous(points: np.array) -> np.array:
+        # Converts (N, 3) points into a (4, N) array of homogeneous columns
+        return np.concatenate((points.T, np.ones((1, points.shape[0]))), axis=0)
+
+    def project(self, H_cm: np.array, marker_pts: np.array) -> np.array:
+        # Projects points in the marker's frame into the image
+        # Inputs:
+        #   H_cm: The homogeneous transform from the marker to the camera
+        #   marker_pts: A (4, N) array of homogeneous points in the marker's frame
+        # Outputs:
+        #   img_pts: The points in image coordinates
+        camera_pts = np.matmul(H_cm, marker_pts)[:3].T
+        img_pts, _ = cv2.projectPoints(objectPoints=camera_pts, rvec=self.zero_vec, tvec=self.zero_vec, cameraMatrix=self.camera_matrix, distCoeffs=self.dist_coeffs)
+        return img_pts
+
+
+# The scene geometry for the constants above, shared by every frame
+SCENE: SceneGeometry = SceneGeometry()
+
+
+class CharacterNotFound(ValueError):
+    # Raised by extract_digit when the marker was found but a character's cell on the whiteboard has nothing written in it
+
+    def __init__(self, index: int):
+        self.index: int = index
+        super().__init__("Could not find the %s on the whiteboard" % CHARACTER_NAMES[index])
+
+
+class MarkerPose:
+    # The ArUco marker found in one camera frame and its pose, detected once and shared by everything drawn on or read from that frame
+
+    def __init__(self, img: np.array, roi: tuple = None):
+        # Inputs:
+        #   img: The camera frame to find the marker in
+        #   roi: An (x0, y0, x1, y1) region of img to search, or None to search the whole frame
+        self.corners = None
+        self.H_cm: np.array = None
+        self.found: bool = False
+
+        # Find markers in image, or in just the region of interest with the corners moved back into image coordinates
+        if roi is None:
+            corners, ids, _ = cv2.aruco.detectMarkers(image=img, dictionary=MARKER_DICT)
+        else:
+            x0, y0, x1, y1 = roi
+            corners, ids, _ = cv2.aruco.detectMarkers(image=img[y0:y1, x0:x1], dictionary=MARKER_DICT)
+            corners = tuple(marker_corners + np.array([x0, y0], dtype=np.float32) for marker_corners in corners)
+
+        # If any were found, get the pose of the first one as a homogeneous transform from marker to camera
+        if ids is not None:
+            rvecs, tvecs, _ = cv2.aruco.estimatePoseSingleMarkers(corners=corners, markerLength=MARKER_SIZE, cameraMatrix=K, distCoeffs=DIST_COEFFS)
+            R_cm, _ = cv2.Rodrigues(rvecs[0])
+            H_cm = np.concatenate((R_cm, tvecs[0].T), axis=1)
+            self.H_cm = np.concatenate((H_cm, LAST_ROW), axis=0)
+            self.corners = corners
+            self.found = True
+
+
+class MarkerTracker:
+    # Follows the marker from frame to frame by only searching a small region around where it was last seen
+    # A full frame detection is only run when the marker hasn't been seen yet or was lost from the tracked region
+
+    def __init__(self):
+        self.corners: np.array = None
+        self.full_detections: int = 0
+        self.tracked_detections: int = 0
+
+    def search_region(self, shape: tuple) -> tuple:
+        # Returns the (x0, y0, x1, y1) region around the last marker corners, padded and clipped to an image of the given shape
+        x0, y0 = self.corners.min(axis=0)
+        x1, y1 = self.corners.max(axis=0)
+        margin = TRACK_MARGIN * max(x1 - x0, y1 - y0)
+        return (max(int(x0 - margin), 0), max(int(y0 - margin), 0), min(int(x1 + margin) + 1, shape[1]), min(int(y1 + margin) + 1, shape[0]))
+
+    def update(self, img: np.array) -> MarkerPose:
+        # Finds the marker in the next frame
+        # Inputs:
+        #   img: The camera frame
+        # Outputs:
+        #   pose: The MarkerPose for this frame (pose.found is False if the marker isn't in it)
+        if self.corners is not None:
+            pose = MarkerPose(img, self.search_region(img.shape))
+            if pose.found:
+                self.tracked_detections += 1
+                self.corners = pose.corners[0].reshape((4, 2))
+                return pose
+
+        # Not tracking, or the marker left the tracked region: fall back to searching the whole frame
+        pose = MarkerPose(img)
+        self.full_detections += 1
+        self.corners = pose.corners[0].reshape((4, 2)) if pose.found else None
+        return pose
+
+
+def project_board(bgr_img: np.array, board_img: np.array, pose: MarkerPose = None, output_img: np.array = None) -> tuple((np.array, np.array, bool)):
     # Projects a chess board onto an image
     # Inputs:
     #   bgr_img: The image (hopefully containing an ArUco marker) to project the board onto
     #   board_img: The image of the board to project
+    #   pose: The marker pose already found in bgr_img, detected here if not given
+    #   output_img: A preallocated image the same shape as bgr_img to draw into, or None to draw onto bgr_img itself
     # Outputs:
     #   output_img: The image with the board on it if there is an ArUco marker, the original image if not
     #   h: The homography matrix found from board to image
     #   success: A boolean that is True if the board was successfully projected, and False if not
 
-    # Define outputs
-    output_img: np.array = bgr_img.copy()
+    # Define outputs, only copying the frame if the caller wants it kept as it is
+    if output_img is None:
+        output_img = bgr_img
+    elif output_img is not bgr_img:
+        np.copyto(output_img, bgr_img)
     h: np.array = None
     success: bool = True
     
-    # Find markers in image
-    corners, ids, _ = cv2.aruco.detectMarkers(image=bgr_img, dictionary=MARKER_DICT)
+    # Find the marker in the image, unless the caller already has
+    if pose is None:
+        pose = MarkerPose(bgr_img)
     
     # If any were found, ...
-    if ids is not None:
-        # Get the pose of the marker
-        rvecs, tvecs, _ = cv2.aruco.estimatePoseSingleMarkers(corners=corners, markerLength=MARKER_SIZE, cameraMatrix=K, distCoeffs=DIST_COEFFS)
-        rvec_m_c = rvecs[0]
-        tm_c = tvecs[0]
-
-        # Construct rotation and translation vectos based on the pose of the marker
-        last_row = np.array([0, 0, 0, 1], dtype=float).reshape((1, 4))       
-        R_cm, _ = cv2.Rodrigues(rvec_m_c)
-        H_cm = np.concatenate((R_cm, tm_c.T), axis=1)
-        H_cm = np.concatenate((H_cm, last_row), axis=0)
-
-        R_mo, _ = cv2.Rodrigues(np.array([0, 0, -math.pi/2], dtype=float))
-        H_mo = np.concatenate((R_mo, OFFSET.T), axis=1)
-        H_mo = np.concatenate((H_mo, last_row), axis=0)
-
-        H_co = np.matmul(H_cm, H_mo)
-        rvec, _ = cv2.Rodrigues(H_co[:3, :3])
-        tvec = H_co[:3, 3]
-
+    if pose.found:
         # Project the corners of the board onto the image
-        img_pts, _ = cv2.projectPoints(objectPoints=WORLD_COORDS, rvec=rvec, tvec=tvec, cameraMatrix=K, distCoeffs=DIST_COEFFS)
+        img_pts = SCENE.project(pose.H_cm, SCENE.board_corners)
         img_pts = img_pts.round(0).astype(int)
 
-        # Define corners of the board image to contian the entire image
-        board_pts: np.array = np.array([(board_img.shape[1], board_img.shape[0]), (0, board_img.shape[0]), (0, 0), (board_img.shape[1], 0)], dtype=float)
-
         # Find a homography between the corners of the board image and the corners in bgr_img
-        h, _ = cv2.findHomography(board_pts, img_pts)
-
-        # Warp the board according to that homography and put it on the output image
-        warped_board: np.array = cv2.warpPerspective(board_img, h, (bgr_img.shape[1], bgr_img.shape[0]))
-        bgr_img: np.array = cv2.fillConvexPoly(bgr_img, img_pts, (0, 0, 0))
-        output_img = bgr_img + warped_board
+        h, _ = cv2.findHomography(SCENE.board_pts(board_img.shape), img_pts)
+
+        # Only the bounding box of the projected board (clipped to the image) needs to be warped into
+        x0, y0 = np.maximum(img_pts.reshape((4, 2)).min(axis=0), 0)
+        x1, y1 = np.minimum(img_pts.reshape((4, 2)).max(axis=0) + 1, (bgr_img.shape[1], bgr_img.shape[0]))
+        if x0 < x1 and y0 < y1:
+            # Warp the board into that box, shifting the homography so the box's corner is the origin
+            shift = np.array([[1, 0, -x0], [0, 1, -y0], [0, 0, 1]], dtype=float)
+            warped_board: np.array = cv2.warpPerspective(board_img, np.matmul(shift, h), (int(x1 - x0), int(y1 - y0)))
+
+            # Copy the warped board over the output image wherever it falls inside the board's outline
+            mask: np.array = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            cv2.fillConvexPoly(mask, img_pts - np.array([x0, y0]), 1)
+            np.copyto(output_img[y0:y1, x0:x1], warped_board, where=mask[:, :, None].astype(bool))
     # If we don't detect any ArUco markers, print that to console and set success equal to false
     else:
         # print('No ArUco markers detected')
@@ -86,53 +219,33 @@ def project_board(bgr_img: np.array, board_img: np.array) -> tuple((np.array, np
     # return the outputs
     return (output_img, h, success)
         
-def extract_digit(img: np.array, index: int) -> tuple((np.array, bool)):
+def extract_digit(img: np.array, index: int, pose: MarkerPose = None) -> tuple((np.array, bool)):
     # Extracts an image of a digit from the whiteboard
     # Inputs:
     #   img: The image of the whiteboard to extract from
-    #   index: The index of the digit to extract (1 - 4)
+    #   index: The index of the digit to extract (0 - 3)
+    #   pose: The marker pose already found in img, detected here if not given
     # Ouputs:
     #   output: An image of the digit
     #   success: A boolean that is False if there were no ArUco markers and True if there was at least 1
 
-    # Find ArUco markers in the image and set up output variables
-    corners, ids, _ = cv2.aruco.detectMarkers(image=img, dictionary=MARKER_DICT)
+    # Find the ArUco marker in the image, unless the caller already has, and set up output variables
+    if pose is None:
+        pose = MarkerPose(img)
     output = None
     success: bool = False
 
-    if ids is not None:  
+    if pose.found:
 
-        # If we found an ArUco markey, success = True
-        success = True  
-
-        # Get the pose of the found marker
-        rvecs, tvecs, _ = cv2.aruco.estimatePoseSingleMarkers(corners=corners, markerLength=MARKER_SIZE, cameraMatrix=K, distCoeffs=DIST_COEFFS)
-        rvec_m_c = rvecs[0]
-        tm_c = tvecs[0]
-
-        # Perform operations to find a homography between the camera and the desired segment of the whiteboard
-        last_row = np.array([0, 0, 0, 1], dtype=float).reshape((1, 4))       
-        R_cm, _ = cv2.Rodrigues(rvec_m_c)
-        H_cm = np.concatenate((R_cm, tm_c.T), axis=1)
-        H_cm = np.concatenate((H_cm, last_row), axis=0)
-        R_mo, _ = cv2.Rodrigues(np.array([0, 0, 0], dtype=float))
-        H_mo = np.concatenate((R_mo, (LETTER_OFFSETS[index]).reshape((1, 3)).T), axis=1)
-        H_mo = np.concatenate((H_mo, last_row), axis=0)
-        H_co = np.matmul(H_cm, H_mo)
-
-        # Use this homography matrix to find the rotation and translation vectors that cv2.ProjectPoints expects
-        rvec, _ = cv2.Rodrigues(H_co[:3, :3])
-        tvec = H_co[:3, 3]
+        # If we found an ArUco marker, success = True
+        success = True
 
         # Get the corners of the desired segment of the whiteboard in image coordinates
-        img_pts, _ = cv2.projectPoints(objectPoints=DIGIT_COORDS, rvec=rvec, tvec=tvec, cameraMatrix=K, distCoeffs=DIST_COEFFS)
-
-        # Define what we want our output points to be (the corners of a 128 by 128 image)
-        output_shape: tuple = (128, 128)
-        output_pts: np.array = np.array([(0, 0), (0, output_shape[0]), (output_shape[1], output_shape[0]), (output_shape[1], 0)], dtype=float)
+        img_pts = SCENE.project(pose.H_cm, SCENE.letter_corners[index])
 
-        # Find a homography between the image and output points
-        h, _ = cv2.findHomography(img_pts, output_pts)
+        # Find a homography between the image and output points (the corners of a 128 by 128 image)
+        output_shape: tuple = DIGIT_SHAPE
+        h, _ = cv2.findHomography(img_pts, SCENE.output_pts)
 
         # Extract just the image of the digit using the found homography, convert it to greyscale, and use adaptive thresholding to convert it to binary
         digit_img = cv2.rotate(cv2.warpPerspective(img, h, (output_shape[1], output_shape[0])), cv2.ROTATE_90_COUNTERCLOCKWISE)
@@ -141,6 +254,8 @@ def extract_digit(img: np.array, index: int) -> tuple((np.array, bool)):
 
         # Find the contours of the binary image and store the largest one by area as what we think our digit is
         contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            raise CharacterNotFound(index)
         biggest_contour = max(contours, key=cv2.contourArea)
         x, y, w, h = cv2.boundingRect(biggest_contour)
 
@@ -163,16 +278,17 @@ def main() -> None:
         print("Cannot read video source")
         sys.exit()
 
-    # Load letter and digit recognition models
-    digit_model = tf.keras.models.load_model("digit_model.h5")
-    letter_model = tf.keras.models.load_model("letter_model.h5")
+    # Imported here since recognition builds on this module
+    from recognition import recognize_move
     
     # Continually read in the video feed until esc or q is pressed
+    tracker = MarkerTracker()
     while True:
         got_img, bgr_img = video_capture.read()
 
-        # Project the board onto the current image and show it
-        projected_img, h, _ = project_board(bgr_img, board_img)
+        # Find the marker once for this frame and project the board onto the current image
+        pose = tracker.update(bgr_img)
+        projected_img, h, _ = project_board(bgr_img, board_img, pose)
         cv2.imshow("test", projected_img)
 
         # Show the image for a millisecond, or exit the loop if a break key was pressed
@@ -182,15 +298,17 @@ def main() -> None:
 
         # Print out letter and digit predictions for testing purposes
         elif key_pressed == ord('m'):
-            for i in range(4):
-                digit, success = extract_digit(bgr_img, i)
-                if not success:
-                    print('Could not detect an ArUco marker, please try again')
-                    continue
-                if(i % 2):
-                    print(np.argmax(digit_model.predict(digit.reshape(-1, 28, 28, 1))[0, 1:9]) + 1)
-                else:
-                    print(LETTER_DICT[np.argmax(letter_model.predict(digit.reshape(-1, 28, 28, 1))[0, 1:9]) + 1])
+            try:
+                startLocation, endLocation, confidence, success = recognize_move(bgr_img, pose)
+            except CharacterNotFound as error:
+                print('%s, please try again' % error)
+                continue
+            if not success:
+                print('Could not detect an ArUco marker, please try again')
+                continue
+            print(startLocation)
+            print(endLocation)
+            print('Confidence: %.2f' % confidence)
     
 
     
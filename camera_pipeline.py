@@ -0,0 +1,231 @@
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+
+from board_projection import CharacterNotFound, MarkerTracker, project_board
+from recognition import recognize_move
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+# Seconds between the per-stage statistics written to the log
+STATS_INTERVAL: float = 5.0
+
+# Weight given to the newest sample in each stage's running average latency
+LATENCY_SMOOTHING: float = 0.1
+
+# How long a stage waits for new input before checking whether the pipeline was stopped
+POLL_TIMEOUT: float = 0.1
+
+# Preallocated images the board is projected into, reused in turn: one being drawn, one waiting in the results
+# buffer and one being displayed, so a frame is never overwritten while the main thread still shows it
+OUTPUT_BUFFERS: int = 3
+
+
+class StageStats:
+    # Running latency and frame counters for one stage of the pipeline
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.frames: int = 0
+        self.dropped: int = 0
+        self.latency: float = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        # Adds one frame that took the given number of seconds to the running average
+        with self.lock:
+            self.latency = seconds if not self.frames else self.latency + LATENCY_SMOOTHING * (seconds - self.latency)
+            self.frames += 1
+
+    def drop(self) -> None:
+        with self.lock:
+            self.dropped += 1
+
+    def __str__(self) -> str:
+        with self.lock:
+            return "%s: %d frames, %d dropped, %.1f ms" % (self.name, self.frames, self.dropped, self.latency * 1000)
+
+
+class LatestFrame:
+    # A one slot buffer between two stages that only ever holds the newest item
+    # The producer never waits: anything it overwrites before the consumer took it is a dropped frame
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.item = None
+        self.sequence: int = 0
+        self.taken: int = 0
+
+    def put(self, item) -> bool:
+        # Stores an item, returning True if it replaced one that was never taken
+        with self.condition:
+            dropped = self.sequence > self.taken
+            self.item = item
+            self.sequence += 1
+            self.condition.notify_all()
+        return dropped
+
+    def get(self, timeout: float = POLL_TIMEOUT):
+        # Returns the newest item not yet taken, waiting up to timeout seconds for one, or None if none arrived
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.sequence > self.taken, timeout):
+                return None
+            self.taken = self.sequence
+            return self.item
+
+    def peek(self):
+        # Returns the newest item whether or not it has been taken
+        with self.condition:
+            return self.item
+
+
+class CameraPipeline:
+    # Runs the camera loop as separate stages so a slow step never stalls the others:
+    #   capture: reads the webcam as fast as it delivers into a latest frame buffer
+    #   process: finds the marker and projects the board onto the newest frame
+    #   recognize: reads a move off the whiteboard when asked, without holding up the overlay
+    # Display stays with the caller (cv2.imshow and cv2.waitKey belong on the main thread), which takes results with latest()
+
+    def __init__(self, video_capture, board_img: np.array):
+        # Inputs:
+        #   video_capture: An opened cv2.VideoCapture
+        #   board_img: The image of the board to project, replaceable at any time through the board_img attribute
+        self.video_capture = video_capture
+        self.board_img: np.array = board_img
+        self.tracker: MarkerTracker = MarkerTracker()
+        self.output_imgs: list = []
+        self.next_output: int = 0
+
+        self.frames: LatestFrame = LatestFrame()
+        self.results: LatestFrame = LatestFrame()
+        self.requests: queue.Queue = queue.Queue(maxsize=1)
+        self.moves: queue.Queue = queue.Queue()
+
+        self.capture_stats: StageStats = StageStats("capture")
+        self.process_stats: StageStats = StageStats("process")
+        self.recognize_stats: StageStats = StageStats("recognize")
+        self.display_stats: StageStats = StageStats("display")
+        self.last_stats_time: float = time.perf_counter()
+
+        self.running: bool = False
+        self.threads: list = []
+
+    def start(self) -> None:
+        self.running = True
+        for target in (self.capture_loop, self.process_loop, self.recognize_loop):
+            thread = threading.Thread(target=target, name=target.__name__, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self) -> None:
+        self.running = False
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        self.log_stats()
+
+    def capture_loop(self) -> None:
+        while self.running:
+            start = time.perf_counter()
+            got_img, bgr_img = self.video_capture.read()
+            if not got_img:
+                LOGGER.warning("Cannot read video source")
+                time.sleep(POLL_TIMEOUT)
+                continue
+            self.capture_stats.record(time.perf_counter() - start)
+            if self.frames.put((bgr_img, start)):
+                self.capture_stats.drop()
+
+    def output_buffer(self, bgr_img: np.array) -> np.array:
+        # Returns the next preallocated image to project a frame into, (re)allocating them if the frame size changed
+        if not self.output_imgs or self.output_imgs[0].shape != bgr_img.shape:
+            self.output_imgs = [np.empty_like(bgr_img) for _ in range(OUTPUT_BUFFERS)]
+            self.next_output = 0
+        output_img = self.output_imgs[self.next_output]
+        self.next_output = (self.next_output + 1) % OUTPUT_BUFFERS
+        return output_img
+
+    def process_loop(self) -> None:
+        while self.running:
+            frame = self.frames.get()
+            if frame is None:
+                continue
+            bgr_img, captured = frame
+            start = time.perf_counter()
+
+            # Find the marker once for this frame and project the board onto a copy of it, keeping the camera image
+            # clean for the camera feed window and for recognition
+            # A frame that can't be processed (e.g. a degenerate pose with no homography) is shown as it is rather
+            # than stopping the stage, which would freeze the display for the rest of the session
+            pose = None
+            try:
+                pose = self.tracker.update(bgr_img)
+                projected_img, _, _ = project_board(bgr_img, self.board_img, pose, self.output_buffer(bgr_img))
+            except Exception:
+                LOGGER.exception("Failed to project the board onto a frame")
+                projected_img = bgr_img
+
+            self.process_stats.record(time.perf_counter() - start)
+            if self.results.put((projected_img, bgr_img, pose, captured)):
+                self.process_stats.drop()
+
+    def recognize_loop(self) -> None:
+        while self.running:
+            try:
+                bgr_img, pose = self.requests.get(timeout=POLL_TIMEOUT)
+            except queue.Empty:
+                continue
+            start = time.perf_counter()
+            # Always answer a request, even with a failure, or main.py is never told the move couldn't be read
+            try:
+                move = recognize_move(bgr_img, pose)
+            except CharacterNotFound as error:
+                move = error
+            except Exception as error:
+                LOGGER.exception("Failed to recognize a move")
+                move = error
+            self.moves.put(move)
+            self.recognize_stats.record(time.perf_counter() - start)
+
+    def latest(self, timeout: float = POLL_TIMEOUT) -> tuple:
+        # Takes the newest processed frame for display
+        # Outputs:
+        #   result: (projected image, camera image, marker pose, capture time), or None if no new frame arrived in time
+        return self.results.get(timeout)
+
+    def frame_shown(self, captured: float) -> None:
+        # Records that a frame has been displayed, timing it from capture to screen
+        self.display_stats.record(time.perf_counter() - captured)
+        if time.perf_counter() - self.last_stats_time >= STATS_INTERVAL:
+            self.log_stats()
+
+    def request_move(self) -> bool:
+        # Asks for the move on the whiteboard in the newest frame to be recognized in the background
+        # Outputs:
+        #   accepted: False if there is no frame yet or a recognition is already in progress
+        result = self.results.peek()
+        if result is None:
+            return False
+        _, bgr_img, pose, _ = result
+        try:
+            self.requests.put_nowait((bgr_img, pose))
+        except queue.Full:
+            return False
+        return True
+
+    def recognized_move(self) -> tuple:
+        # Returns the result of a finished recognition as recognize_move does, the exception it raised if it failed
+        # (a CharacterNotFound naming the character if a whiteboard cell was empty), or None if there isn't one waiting
+        try:
+            return self.moves.get_nowait()
+        except queue.Empty:
+            return None
+
+    def log_stats(self) -> None:
+        self.last_stats_time = time.perf_counter()
+        for stats in (self.capture_stats, self.process_stats, self.recognize_stats, self.display_stats):
+            LOGGER.info("%s", stats)
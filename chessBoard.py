@@ -1,52 +1,167 @@
-import numpy as np
-import cv2
+import logging
+
+from pieces.pawn import Pawn
+from pieces.knight import Knight
+from pieces.bishop import Bishop
+from pieces.rook import Rook
+from pieces.queen import Queen
+from pieces.king import King
+from engine.bitboard import (Position, QUEEN, COLOUR_NAMES, EN_PASSANT, CASTLING, CASTLING_ROOK_SQUARES, square,
+                             squarePosition, iterBits)
+from engine.move import moveFrom, moveTo, movePromotion, moveName
+from engine.movegen import generateLegalMoves, isInCheck
+from engine import perft
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+#Piece classes indexed by their bitboard piece kind
+PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+
+
+def positionFromBoardDict(boardDict, turn="white"):
+    position = Position()
+    for location in boardDict:
+        piece = boardDict[location]
+        position.putPiece(square(location[0], location[1]), piece.colour, piece.kind)
+    position.checkKings()
+    position.sideToMove = COLOUR_NAMES.index(turn)
+    position.inferCastlingRights()
+    position.refreshKey()
+    return position
+
+
+def boardDictFromPosition(position, previous):
+    #Piece dict for the current bitboards, reusing the piece objects from previous that are still on their squares
+    boardDict = {}
+    for sq in iterBits(position.occupied):
+        code = position.board[sq]
+        location = squarePosition(sq)
+        pieceClass = PIECE_CLASSES[code & 7]
+        piece = previous.get(location)
+        if type(piece) is not pieceClass or piece.colour != code >> 3:
+            piece = pieceClass(location, code >> 3)
+        boardDict[location] = piece
+    return boardDict
+
 
 class ChessBoard:
 
-    def __init__(self, boardDict):
+    def __init__(self, boardDict, turn="white"):
+        #boardDict is kept as the view handed to the display code, position is the bitboard core the rules run on
         self.boardDict = boardDict
+        self.position = positionFromBoardDict(boardDict, turn)
+
+        #makeMove/unmakeMove only touch the bitboards, so boardDict is rebuilt lazily once the two have diverged
+        self.version = 0
+        self.boardDictVersion = 0
 
     def movePiece(self, startLocation, endLocation, turn):
-        print(startLocation)
-        print(endLocation)
+        LOGGER.debug("Move requested from %s to %s", startLocation, endLocation)
         startLocation = self.stringLocationToNumLocation(startLocation)
         endLocation = self.stringLocationToNumLocation(endLocation)
+        self.getBoardDict()
 
-        print(startLocation)
-        print(endLocation)
         if startLocation not in self.boardDict:
-            print("Error: " + str(startLocation[0]) + str(startLocation[1]) + " is not a valid piece location")
+            LOGGER.warning("%s%s is not a valid piece location", startLocation[0], startLocation[1])
             return False
         elif startLocation in self.boardDict:
             if self.boardDict[startLocation].blackwhite != turn:
-                print("Error: It is " + turn + "'s turn to play")
+                LOGGER.warning("It is %s's turn to play", turn)
                 return False
 
-            selectedPiece = self.boardDict[startLocation]
-            validMoves = selectedPiece.findValidMoves(self.boardDict)
-
-            print(validMoves)
+            move = self.findMove(startLocation, endLocation)
 
-            if endLocation in validMoves:
-                self.boardDict[endLocation] = selectedPiece
-                self.boardDict[endLocation].position = endLocation
-                self.boardDict.pop(startLocation)
+            if move is not None:
+                self.applyMove(move)
             else:
-                print("Error: " + str(endLocation[0]) + str(endLocation[1]) +
-                      " is not a valid move for the selected piece. The selected piece was " + str(startLocation[0])
-                      + str(startLocation[1]))
+                LOGGER.warning("%s%s is not a valid move for the selected piece. The selected piece was %s%s",
+                               endLocation[0], endLocation[1], startLocation[0], startLocation[1])
                 return False
 
         return self.boardDict
 
+    def legalMoves(self):
+        #Every legal move for the side to move, encoded as described in engine.move
+        return generateLegalMoves(self.position)
+
+    def inCheck(self):
+        return isInCheck(self.position)
+
+    def findMove(self, startLocation, endLocation, promotion=QUEEN):
+        fromSq = square(startLocation[0], startLocation[1])
+        toSq = square(endLocation[0], endLocation[1])
+        for move in self.legalMoves():
+            if moveFrom(move) == fromSq and moveTo(move) == toSq and movePromotion(move) in (0, promotion):
+                return move
+        return None
+
+    def makeMove(self, move):
+        #Search interface: plays a legal move on the bitboards only, recording an undo entry
+        self.position.makeMove(move)
+        self.version += 1
+
+    def unmakeMove(self):
+        self.position.unmakeMove()
+        self.version += 1
+
+    def applyMove(self, move):
+        #Play a legal move on both the bitboards and the piece dict
+        self.getBoardDict()
+        startLocation = squarePosition(moveFrom(move))
+        endLocation = squarePosition(moveTo(move))
+        selectedPiece = self.boardDict.pop(startLocation)
+
+        capturedLocation = endLocation
+        if move & EN_PASSANT:
+            capturedLocation = (endLocation[0], startLocation[1])
+        if capturedLocation in self.boardDict:
+            self.boardDict.pop(capturedLocation).capture()
+
+        if movePromotion(move):
+            selectedPiece = PIECE_CLASSES[movePromotion(move)](endLocation, selectedPiece.colour)
+        else:
+            selectedPiece.move(endLocation)
+            if isinstance(selectedPiece, Pawn):
+                selectedPiece.firstMove = False
+        self.boardDict[endLocation] = selectedPiece
+
+        if move & CASTLING:
+            rookFrom, rookTo = CASTLING_ROOK_SQUARES[moveTo(move)]
+            rook = self.boardDict.pop(squarePosition(rookFrom))
+            rook.move(squarePosition(rookTo))
+            self.boardDict[squarePosition(rookTo)] = rook
+
+        self.makeMove(move)
+        self.boardDictVersion = self.version
+
+    def positionKey(self):
+        #64-bit Zobrist key of the current position
+        return self.position.key
+
+    def isRepetition(self, times=2):
+        #True once the current position has occurred before the given number of times (2 = threefold repetition)
+        return self.position.repetitions() >= times
+
+    def perft(self, depth, processes=1):
+        #Number of leaf nodes of the legal move tree to the given depth, optionally split over a process pool
+        if processes > 1:
+            return sum(perft.perftDivide(self.position, depth, processes).values())
+        return perft.perft(self.position, depth)
+
+    def perftDivide(self, depth, processes=1, out=print):
+        #Prints the node count below each root move and the nodes-per-second rate, and returns the counts
+        nodes, elapsed, divide = perft.timedPerft(self.position, depth, processes)
+        for move in sorted(divide, key=moveName):
+            out(moveName(move) + ": " + str(divide[move]))
+        out("")
+        out(perft.formatRate(nodes, elapsed))
+        return {moveName(move): divide[move] for move in divide}
+
     def evaluate(self):
-        eval = 0
-        for key in self.boardDict:
-            if self.boardDict[key].blackwhite == "white":
-                eval = eval + self.boardDict[key].value
-            else:
-                eval = eval - self.boardDict[key].value
-        return eval
+        #Material and piece-square score in centipawns, positive when white is better. The position keeps it up to
+        #date on every move, so this is O(1).
+        return self.position.score
 
     def stringLocationToNumLocation(self, location):
         numLoc = [0,0]
@@ -56,4 +171,10 @@ class ChessBoard:
         return tuple(numLoc)
 
     def getBoardDict(self):
-        return self.boardDict
\ No newline at end of file
+        if self.boardDictVersion != self.version:
+            #Refill in place so callers holding the dict see the current position
+            current = boardDictFromPosition(self.position, self.boardDict)
+            self.boardDict.clear()
+            self.boardDict.update(current)
+            self.boardDictVersion = self.version
+        return self.boardDict
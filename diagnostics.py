@@ -0,0 +1,50 @@
+"""
+Logging setup for the chess project.
+
+The rules engine (chessBoard, pieces, engine) and the renderers log through the standard logging module under their
+module names and emit nothing unless logging is configured. Diagnostics are switched on per subsystem with the
+CHESS_LOG environment variable, a comma separated list of logger=LEVEL entries, e.g.
+
+    CHESS_LOG=chessBoard=DEBUG,graphics=INFO python main.py
+
+A bare level (CHESS_LOG=DEBUG) applies to everything.
+"""
+
+import logging
+import os
+import sys
+
+
+ENV_VAR = 'CHESS_LOG'
+DEFAULT_LEVEL = logging.WARNING
+LOG_FORMAT = '%(levelname)s %(name)s: %(message)s'
+
+
+def parse_spec(spec):
+    """Parse a CHESS_LOG style specification into a list of (logger name, level) pairs. An empty logger name refers
+    to the root logger."""
+    levels = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, level = item.rpartition('=')
+        level_value = logging.getLevelName(level.strip().upper())
+        if not isinstance(level_value, int):
+            raise ValueError("Unrecognized log level %r in %s entry %r." % (level, ENV_VAR, item))
+        levels.append((name.strip(), level_value))
+    return levels
+
+
+def configure_logging(spec=None, stream=None):
+    """Attach a console handler to the root logger and apply per-subsystem levels. The specification defaults to the
+    CHESS_LOG environment variable; without one only warnings and errors are shown."""
+    if spec is None:
+        spec = os.environ.get(ENV_VAR, '')
+    root = logging.getLogger()
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(DEFAULT_LEVEL)
+    for name, level in parse_spec(spec):
+        logging.getLogger(name or None).setLevel(level)
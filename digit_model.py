@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+from model_export import export_numpy
 
 def main():
     os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
@@ -48,5 +49,8 @@ def main():
     # Save the model for use in main.py
     cnn_model.save('./digit_model.h5', save_format='h5')
 
+    # Export it for the NumPy backend as well, which main.py prefers over the .h5
+    export_numpy('./digit_model.h5')
+
 if __name__ == "__main__":
     main()
@@ -29,6 +29,9 @@ SOURCE_URLS = [
 
 CACHE_FILE_PATH = '~/.cache/emnist/emnist.zip'
 PARTIAL_EXT = '_partial'
+# Decoded arrays are kept as .npy files in this folder, next to the cached zip file
+ARRAY_CACHE_FOLDER = 'arrays'
+ARRAY_FILE_TEMPLATE = 'emnist-{dataset}-{usage}-{component}.npy'
 ZIP_PATH_TEMPLATE = 'gzip/emnist-{dataset}-{usage}-{matrix}-idx{dim}-ubyte.gz'
 DATASET_ZIP_PATH_REGEX = re.compile(r'gzip/emnist-(.*)-test-images-idx3-ubyte\.gz')
 GOOGLE_DRIVE_CONFIRMATION_LINK_REGEX = re.compile(rb'href="(/uc\?export=download.*?confirm=.*?)">Download anyway</a>')
@@ -102,11 +105,22 @@ def get_cached_data_path():
     return os.path.expanduser(CACHE_FILE_PATH)
 
 
+def get_cached_array_path(dataset, usage, component):
+    """Return the path where a decoded image or label array is (or will be) cached."""
+    return os.path.join(os.path.dirname(get_cached_data_path()), ARRAY_CACHE_FOLDER,
+                        ARRAY_FILE_TEMPLATE.format(dataset=dataset, usage=usage, component=component))
+
+
 def clear_cached_data():
-    """Delete the cached EMNIST data, including the temporary file that can be created by an interrupted download."""
+    """Delete the cached EMNIST data, including the decoded arrays and the temporary file that can be created by an
+    interrupted download."""
     cache_path = get_cached_data_path()
     temp_path = cache_path + PARTIAL_EXT
-    for path in (cache_path, temp_path):
+    array_folder = os.path.join(os.path.dirname(cache_path), ARRAY_CACHE_FOLDER)
+    paths = [cache_path, temp_path]
+    if os.path.isdir(array_folder):
+        paths.extend(os.path.join(array_folder, name) for name in os.listdir(array_folder))
+    for path in paths:
         if os.path.isfile(path):
             LOGGER.info("Removing cache file %s.", path)
             os.remove(path)
@@ -170,15 +184,31 @@ def parse_idx(data):
 
 def extract_data(dataset, usage, component):
     """Extract an image or label array. The dataset must be one of those listed by list_datasets(), e.g. 'digits' or
-    'mnist'. Usage should be either 'train' or 'test'. Component should be either 'images' or 'labels'."""
+    'mnist'. Usage should be either 'train' or 'test'. Component should be either 'images' or 'labels'.
+
+    The first extraction decodes the array from the zip file and saves it as a .npy file in the cache. Every extraction
+    after that memory-maps the .npy file, so it is near-instant and concurrent processes share the same pages. The
+    returned array is read-only; copy it (or index it, which copies) before modifying it."""
     if usage not in ('train', 'test'):
         raise ValueError("Unrecognized value %r for usage. Expected 'train' or 'test'." % usage)
-    if component == 'images':
-        dim = 3
-    elif component == 'labels':
-        dim = 1
-    else:
+    if component not in ('images', 'labels'):
         raise ValueError("Unrecognized value %r for component. Expected 'images' or 'labels'." % component)
+    array_path = get_cached_array_path(dataset, usage, component)
+    if not os.path.isfile(array_path):
+        array = decode_data(dataset, usage, component)
+        os.makedirs(os.path.dirname(array_path), exist_ok=True)
+        # Write under a name unique to this process and rename into place, so a concurrent job never sees half a file
+        temp_path = '%s.%d%s' % (array_path, os.getpid(), PARTIAL_EXT)
+        with open(temp_path, 'wb') as temp_file:
+            numpy.save(temp_file, numpy.ascontiguousarray(array))
+        os.replace(temp_path, array_path)
+        LOGGER.info("Cached decoded array at %s.", array_path)
+    return numpy.load(array_path, mmap_mode='r')
+
+
+def decode_data(dataset, usage, component):
+    """Decode an image or label array directly from the cached zip file, without using the decoded array cache."""
+    dim = 3 if component == 'images' else 1
     ensure_cached_data()
     cache_path = get_cached_data_path()
     zip_internal_path = ZIP_PATH_TEMPLATE.format(dataset=dataset, usage=usage, matrix=component, dim=dim)
@@ -0,0 +1,156 @@
+from .bitboard import square
+
+#Precomputed attack tables. Leapers (knight, king, pawn captures) are a single lookup per square. Sliders use
+#per-square ray tables to build an occupancy-indexed table: the relevant blockers for a square are masked out of
+#the board occupancy and used directly as the key, which plays the role of the magic multiply/shift (or PEXT)
+#index in a C engine, so a slider costs one mask and one lookup regardless of how far it can travel.
+
+#Directions as (dx, dy) steps. The first four are orthogonal (rook), the last four diagonal (bishop), and opposite
+#directions are paired so that direction ^ 1 reverses a direction.
+NORTH = 0
+SOUTH = 1
+WEST = 2
+EAST = 3
+NORTH_WEST = 4
+SOUTH_EAST = 5
+NORTH_EAST = 6
+SOUTH_WEST = 7
+DIRECTIONS = ((0, 1), (0, -1), (-1, 0), (1, 0), (-1, 1), (1, -1), (1, 1), (-1, -1))
+ROOK_DIRECTIONS = (NORTH, SOUTH, WEST, EAST)
+BISHOP_DIRECTIONS = (NORTH_WEST, SOUTH_EAST, NORTH_EAST, SOUTH_WEST)
+#Whether stepping in a direction increases the square index, i.e. whether its nearest blocker is the lowest set bit
+POSITIVE_DIRECTION = (True, False, False, True, True, False, True, False)
+
+KNIGHT_STEPS = ((-1, 2), (1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1))
+KING_STEPS = ((-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0))
+
+
+def _onBoard(x, y):
+    return 0 <= x <= 7 and 0 <= y <= 7
+
+
+def _stepMask(sq, steps):
+    x, y = sq & 7, sq >> 3
+    mask = 0
+    for dx, dy in steps:
+        if _onBoard(x + dx, y + dy):
+            mask |= 1 << square(x + dx, y + dy)
+    return mask
+
+
+def _ray(sq, direction):
+    dx, dy = DIRECTIONS[direction]
+    x, y = (sq & 7) + dx, (sq >> 3) + dy
+    mask = 0
+    while _onBoard(x, y):
+        mask |= 1 << square(x, y)
+        x += dx
+        y += dy
+    return mask
+
+
+KNIGHT_ATTACKS = [_stepMask(sq, KNIGHT_STEPS) for sq in range(64)]
+KING_ATTACKS = [_stepMask(sq, KING_STEPS) for sq in range(64)]
+#PAWN_ATTACKS[colour][sq] holds the squares a pawn of that colour on sq captures on
+PAWN_ATTACKS = [[_stepMask(sq, ((-1, 1), (1, 1))) for sq in range(64)],
+                [_stepMask(sq, ((-1, -1), (1, -1))) for sq in range(64)]]
+
+#RAYS[direction][sq] is every square from sq to the edge of the board in that direction, excluding sq
+RAYS = [[_ray(sq, direction) for sq in range(64)] for direction in range(8)]
+
+#BETWEEN[a][b] is the squares strictly between two aligned squares (0 if they don't share a line), LINE[a][b] the
+#whole line through both. Used for pins and check blocking.
+def _buildLines():
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for a in range(64):
+        for direction in range(8):
+            opposite = direction ^ 1
+            ray = RAYS[direction][a]
+            bits = ray
+            while bits:
+                low = bits & -bits
+                b = low.bit_length() - 1
+                between[a][b] = ray & RAYS[opposite][b]
+                line[a][b] = ray | RAYS[opposite][a] | (1 << a)
+                bits ^= low
+    return between, line
+
+
+BETWEEN, LINE = _buildLines()
+
+
+def _slidingAttacks(sq, occupied, directions):
+    #Reference slider generation from the ray tables, used to fill the lookup tables below
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            if POSITIVE_DIRECTION[direction]:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= RAYS[direction][blocker]
+        attacks |= ray
+    return attacks
+
+
+def _relevantMask(sq, directions):
+    #Blockers on the last square of a ray never change the attack set, so they are left out of the index
+    x, y = sq & 7, sq >> 3
+    mask = 0
+    for direction in directions:
+        dx, dy = DIRECTIONS[direction]
+        cx, cy = x + dx, y + dy
+        while _onBoard(cx + dx, cy + dy):
+            mask |= 1 << square(cx, cy)
+            cx += dx
+            cy += dy
+    return mask
+
+
+def _buildTable(masks, directions):
+    table = []
+    for sq in range(64):
+        mask = masks[sq]
+        entries = {}
+        #Enumerate every subset of the mask (carry-rippler)
+        subset = 0
+        while True:
+            entries[subset] = _slidingAttacks(sq, subset, directions)
+            subset = (subset - mask) & mask
+            if subset == 0:
+                break
+        table.append(entries)
+    return table
+
+
+ROOK_MASKS = [_relevantMask(sq, ROOK_DIRECTIONS) for sq in range(64)]
+BISHOP_MASKS = [_relevantMask(sq, BISHOP_DIRECTIONS) for sq in range(64)]
+ROOK_TABLE = _buildTable(ROOK_MASKS, ROOK_DIRECTIONS)
+BISHOP_TABLE = _buildTable(BISHOP_MASKS, BISHOP_DIRECTIONS)
+
+
+def rookAttacks(sq, occupied):
+    return ROOK_TABLE[sq][occupied & ROOK_MASKS[sq]]
+
+
+def bishopAttacks(sq, occupied):
+    return BISHOP_TABLE[sq][occupied & BISHOP_MASKS[sq]]
+
+
+def queenAttacks(sq, occupied):
+    return ROOK_TABLE[sq][occupied & ROOK_MASKS[sq]] | BISHOP_TABLE[sq][occupied & BISHOP_MASKS[sq]]
+
+
+def knightAttacks(sq):
+    return KNIGHT_ATTACKS[sq]
+
+
+def kingAttacks(sq):
+    return KING_ATTACKS[sq]
+
+
+def pawnAttacks(colour, sq):
+    return PAWN_ATTACKS[colour][sq]
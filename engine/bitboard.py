@@ -0,0 +1,345 @@
+from .zobrist import PIECE_KEYS, CASTLING_KEYS, EP_FILE_KEYS, SIDE_KEY, computeKey
+from .evaluation import SQUARE_SCORES
+
+#Bitboard position core. Squares are numbered 0-63 as y * 8 + x, so the (x, y) tuples used as boardDict keys
+#map directly onto bit indices: (0,0) is A1 = bit 0 and (7,7) is H8 = bit 63.
+
+WHITE = 0
+BLACK = 1
+COLOUR_NAMES = ("white", "black")
+
+PAWN = 0
+KNIGHT = 1
+BISHOP = 2
+ROOK = 3
+QUEEN = 4
+KING = 5
+KIND_NAMES = ("pawn", "knight", "bishop", "rook", "queen", "king")
+
+#Mailbox entries are colour << 3 | kind, or EMPTY
+EMPTY = -1
+
+#Castling rights bit flags
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+ALL_CASTLING = 15
+
+NO_SQUARE = -1
+
+#Special move flags, see engine.move for the full move encoding
+EN_PASSANT = 1 << 15
+CASTLING = 1 << 16
+DOUBLE_PUSH = 1 << 17
+
+FULL = 0xFFFFFFFFFFFFFFFF
+FILE_A = 0x0101010101010101
+FILE_H = 0x8080808080808080
+RANK_1 = 0x00000000000000FF
+RANK_8 = 0xFF00000000000000
+
+FEN_LETTERS = "pnbrqk"
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+#Rights that survive a move touching each square (king and rook home squares clear their rights)
+CASTLING_MASK = [ALL_CASTLING] * 64
+CASTLING_MASK[0] = ALL_CASTLING & ~WHITE_QUEENSIDE
+CASTLING_MASK[7] = ALL_CASTLING & ~WHITE_KINGSIDE
+CASTLING_MASK[4] = ALL_CASTLING & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[56] = ALL_CASTLING & ~BLACK_QUEENSIDE
+CASTLING_MASK[63] = ALL_CASTLING & ~BLACK_KINGSIDE
+CASTLING_MASK[60] = ALL_CASTLING & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+
+#Rook (from, to) squares for each castling king destination
+CASTLING_ROOK_SQUARES = {6: (7, 5), 2: (0, 3), 62: (63, 61), 58: (56, 59)}
+
+
+def square(x, y):
+    return y * 8 + x
+
+
+def squarePosition(sq):
+    return (sq & 7, sq >> 3)
+
+
+def squareName(sq):
+    return "abcdefgh"[sq & 7] + str((sq >> 3) + 1)
+
+
+def parseSquare(name):
+    return square(ord(name[0].lower()) - 97, int(name[1]) - 1)
+
+
+def lsb(bb):
+    return (bb & -bb).bit_length() - 1
+
+
+def popCount(bb):
+    return bin(bb).count("1")
+
+
+def iterBits(bb):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+class Position:
+
+    def __init__(self):
+        #pieces[colour][kind] is the occupancy mask of that colour's pieces of that kind
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupancy = [0, 0]
+        self.occupied = 0
+        self.board = [EMPTY] * 64
+        #Running material + piece-square score in centipawns for white, kept up to date by every board change
+        self.score = 0
+
+        self.sideToMove = WHITE
+        self.castling = 0
+        self.epSquare = NO_SQUARE
+        self.halfmoveClock = 0
+        self.fullmoveNumber = 1
+
+        #Undo stack, one packed int per move played (see makeMove), and the Zobrist key before each of those moves
+        self.history = []
+        self.keyHistory = []
+        self.key = computeKey(self)
+
+    def putPiece(self, sq, colour, kind):
+        bit = 1 << sq
+        self.pieces[colour][kind] |= bit
+        self.occupancy[colour] |= bit
+        self.occupied |= bit
+        self.board[sq] = colour << 3 | kind
+        self.score += SQUARE_SCORES[colour << 3 | kind][sq]
+
+    def removePiece(self, sq):
+        code = self.board[sq]
+        bit = 1 << sq
+        colour = code >> 3
+        self.pieces[colour][code & 7] ^= bit
+        self.occupancy[colour] ^= bit
+        self.occupied ^= bit
+        self.board[sq] = EMPTY
+        self.score -= SQUARE_SCORES[code][sq]
+        return code
+
+    def shiftPiece(self, fromSq, toSq):
+        code = self.board[fromSq]
+        colour = code >> 3
+        change = (1 << fromSq) | (1 << toSq)
+        self.pieces[colour][code & 7] ^= change
+        self.occupancy[colour] ^= change
+        self.occupied ^= change
+        self.board[fromSq] = EMPTY
+        self.board[toSq] = code
+        scores = SQUARE_SCORES[code]
+        self.score += scores[toSq] - scores[fromSq]
+
+    def makeMove(self, move):
+        fromSq = move & 63
+        toSq = (move >> 6) & 63
+        promotion = (move >> 12) & 7
+        colour = self.sideToMove
+
+        #The undo entry packs the move with everything it destroys: the captured piece (+1 so EMPTY packs as 0),
+        #castling rights, en passant square (+1) and halfmove clock
+        captured = self.board[toSq]
+        capturedSq = toSq
+        if move & EN_PASSANT:
+            capturedSq = toSq - 8 if colour == WHITE else toSq + 8
+            captured = self.board[capturedSq]
+        self.history.append(move | (captured + 1) << 18 | self.castling << 22 | (self.epSquare + 1) << 26
+                            | self.halfmoveClock << 33)
+        self.keyHistory.append(self.key)
+
+        key = self.key ^ SIDE_KEY ^ CASTLING_KEYS[self.castling]
+        if self.epSquare != NO_SQUARE:
+            key ^= EP_FILE_KEYS[self.epSquare & 7]
+
+        self.halfmoveClock += 1
+        if captured != EMPTY:
+            self.removePiece(capturedSq)
+            key ^= PIECE_KEYS[captured][capturedSq]
+            self.halfmoveClock = 0
+
+        code = self.board[fromSq]
+        if code & 7 == PAWN:
+            self.halfmoveClock = 0
+        self.shiftPiece(fromSq, toSq)
+        key ^= PIECE_KEYS[code][fromSq] ^ PIECE_KEYS[code][toSq]
+
+        if promotion:
+            self.removePiece(toSq)
+            self.putPiece(toSq, colour, promotion)
+            key ^= PIECE_KEYS[code][toSq] ^ PIECE_KEYS[colour << 3 | promotion][toSq]
+        elif move & CASTLING:
+            rookFrom, rookTo = CASTLING_ROOK_SQUARES[toSq]
+            self.shiftPiece(rookFrom, rookTo)
+            key ^= PIECE_KEYS[colour << 3 | ROOK][rookFrom] ^ PIECE_KEYS[colour << 3 | ROOK][rookTo]
+
+        self.castling &= CASTLING_MASK[fromSq] & CASTLING_MASK[toSq]
+        key ^= CASTLING_KEYS[self.castling]
+        if move & DOUBLE_PUSH:
+            self.epSquare = (fromSq + toSq) >> 1
+            key ^= EP_FILE_KEYS[self.epSquare & 7]
+        else:
+            self.epSquare = NO_SQUARE
+        self.key = key
+        if colour == BLACK:
+            self.fullmoveNumber += 1
+        self.sideToMove = colour ^ 1
+
+    def unmakeMove(self):
+        #Takes back the last move played by makeMove
+        entry = self.history.pop()
+        fromSq = entry & 63
+        toSq = (entry >> 6) & 63
+        colour = self.sideToMove ^ 1
+
+        if entry & (7 << 12):
+            self.removePiece(toSq)
+            self.putPiece(toSq, colour, PAWN)
+        elif entry & CASTLING:
+            rookFrom, rookTo = CASTLING_ROOK_SQUARES[toSq]
+            self.shiftPiece(rookTo, rookFrom)
+        self.shiftPiece(toSq, fromSq)
+
+        captured = ((entry >> 18) & 15) - 1
+        if captured != EMPTY:
+            capturedSq = toSq
+            if entry & EN_PASSANT:
+                capturedSq = toSq - 8 if colour == WHITE else toSq + 8
+            self.putPiece(capturedSq, captured >> 3, captured & 7)
+
+        self.castling = (entry >> 22) & 15
+        self.epSquare = ((entry >> 26) & 127) - 1
+        self.halfmoveClock = entry >> 33
+        self.key = self.keyHistory.pop()
+        if colour == BLACK:
+            self.fullmoveNumber -= 1
+        self.sideToMove = colour
+
+    def repetitions(self):
+        #How many times the current position has occurred before. Only positions since the last capture or pawn
+        #move can repeat, and only every second ply has the same side to move.
+        count = 0
+        keys = self.keyHistory
+        last = len(keys) - 1 - min(self.halfmoveClock, len(keys))
+        for i in range(len(keys) - 2, last, -2):
+            if keys[i] == self.key:
+                count += 1
+        return count
+
+    def refreshKey(self):
+        self.key = computeKey(self)
+
+    def pieceAt(self, sq):
+        return self.board[sq]
+
+    def kingSquare(self, colour):
+        return lsb(self.pieces[colour][KING])
+
+    def copy(self):
+        other = Position.__new__(Position)
+        other.pieces = [self.pieces[WHITE][:], self.pieces[BLACK][:]]
+        other.occupancy = self.occupancy[:]
+        other.occupied = self.occupied
+        other.board = self.board[:]
+        other.score = self.score
+        other.sideToMove = self.sideToMove
+        other.castling = self.castling
+        other.epSquare = self.epSquare
+        other.halfmoveClock = self.halfmoveClock
+        other.fullmoveNumber = self.fullmoveNumber
+        other.history = self.history[:]
+        other.keyHistory = self.keyHistory[:]
+        other.key = self.key
+        return other
+
+    @staticmethod
+    def fromFen(fen):
+        fields = fen.split()
+        position = Position()
+
+        y = 7
+        for row in fields[0].split("/"):
+            x = 0
+            for char in row:
+                if char.isdigit():
+                    x += int(char)
+                else:
+                    colour = WHITE if char.isupper() else BLACK
+                    position.putPiece(square(x, y), colour, FEN_LETTERS.index(char.lower()))
+                    x += 1
+            y -= 1
+
+        position.sideToMove = WHITE if len(fields) < 2 or fields[1] == "w" else BLACK
+
+        if len(fields) > 2:
+            for char, flag in zip("KQkq", (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+                if char in fields[2]:
+                    position.castling |= flag
+
+        if len(fields) > 3 and fields[3] != "-":
+            position.epSquare = parseSquare(fields[3])
+        if len(fields) > 4:
+            position.halfmoveClock = int(fields[4])
+        if len(fields) > 5:
+            position.fullmoveNumber = int(fields[5])
+
+        position.checkKings()
+        position.refreshKey()
+        return position
+
+    def fen(self):
+        rows = []
+        for y in range(7, -1, -1):
+            row = ""
+            empty = 0
+            for x in range(8):
+                code = self.board[square(x, y)]
+                if code == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                letter = FEN_LETTERS[code & 7]
+                row += letter.upper() if code >> 3 == WHITE else letter
+            if empty:
+                row += str(empty)
+            rows.append(row)
+
+        castling = ""
+        for char, flag in zip("KQkq", (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+            if self.castling & flag:
+                castling += char
+
+        return " ".join(("/".join(rows), "wb"[self.sideToMove], castling or "-",
+                         squareName(self.epSquare) if self.epSquare != NO_SQUARE else "-",
+                         str(self.halfmoveClock), str(self.fullmoveNumber)))
+
+    def checkKings(self):
+        #Move generation finds each side's king with lsb, which gives -1 (square 63 when used as an index) without one
+        for colour in (WHITE, BLACK):
+            kings = popCount(self.pieces[colour][KING])
+            if kings != 1:
+                raise ValueError("Position must have exactly one %s king, found %d" % (COLOUR_NAMES[colour], kings))
+
+    def inferCastlingRights(self):
+        #A boardDict carries no move history, so grant every right whose king and rook are still on their home squares
+        self.castling = 0
+        if self.board[4] == WHITE << 3 | KING:
+            if self.board[7] == WHITE << 3 | ROOK:
+                self.castling |= WHITE_KINGSIDE
+            if self.board[0] == WHITE << 3 | ROOK:
+                self.castling |= WHITE_QUEENSIDE
+        if self.board[60] == BLACK << 3 | KING:
+            if self.board[63] == BLACK << 3 | ROOK:
+                self.castling |= BLACK_KINGSIDE
+            if self.board[56] == BLACK << 3 | ROOK:
+                self.castling |= BLACK_QUEENSIDE
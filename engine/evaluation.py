@@ -0,0 +1,96 @@
+#Material and piece-square evaluation, in centipawns from white's point of view.
+#Every (piece, square) pair has a single precomputed score combining the piece's material value with its
+#piece-square bonus, negated for black. Position adds or subtracts one entry whenever it puts, removes or moves a
+#piece, so the running total is always up to date and evaluating a leaf is just reading it.
+
+#Both tables are indexed by piece kind: pawn, knight, bishop, rook, queen, king
+MATERIAL = (100, 320, 330, 500, 900, 0)
+
+#Piece-square bonuses from white's side of the board, written with rank 8 at the top
+PIECE_SQUARE_TABLES = (
+    (
+        0,   0,   0,   0,   0,   0,   0,   0,
+        50,  50,  50,  50,  50,  50,  50,  50,
+        10,  10,  20,  30,  30,  20,  10,  10,
+        5,   5,   10,  25,  25,  10,  5,   5,
+        0,   0,   0,   20,  20,  0,   0,   0,
+        5,   -5,  -10, 0,   0,   -10, -5,  5,
+        5,   10,  10,  -20, -20, 10,  10,  5,
+        0,   0,   0,   0,   0,   0,   0,   0,
+    ),
+    (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0,   0,   0,   0,   -20, -40,
+        -30, 0,   10,  15,  15,  10,  0,   -30,
+        -30, 5,   15,  20,  20,  15,  5,   -30,
+        -30, 0,   15,  20,  20,  15,  0,   -30,
+        -30, 5,   10,  15,  15,  10,  5,   -30,
+        -40, -20, 0,   5,   5,   0,   -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ),
+    (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0,   0,   0,   0,   0,   0,   -10,
+        -10, 0,   5,   10,  10,  5,   0,   -10,
+        -10, 5,   5,   10,  10,  5,   5,   -10,
+        -10, 0,   10,  10,  10,  10,  0,   -10,
+        -10, 10,  10,  10,  10,  10,  10,  -10,
+        -10, 5,   0,   0,   0,   0,   5,   -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ),
+    (
+        0,   0,   0,   0,   0,   0,   0,   0,
+        5,   10,  10,  10,  10,  10,  10,  5,
+        -5,  0,   0,   0,   0,   0,   0,   -5,
+        -5,  0,   0,   0,   0,   0,   0,   -5,
+        -5,  0,   0,   0,   0,   0,   0,   -5,
+        -5,  0,   0,   0,   0,   0,   0,   -5,
+        -5,  0,   0,   0,   0,   0,   0,   -5,
+        0,   0,   0,   5,   5,   0,   0,   0,
+    ),
+    (
+        -20, -10, -10, -5,  -5,  -10, -10, -20,
+        -10, 0,   0,   0,   0,   0,   0,   -10,
+        -10, 0,   5,   5,   5,   5,   0,   -10,
+        -5,  0,   5,   5,   5,   5,   0,   -5,
+        0,   0,   5,   5,   5,   5,   0,   -5,
+        -10, 5,   5,   5,   5,   5,   0,   -10,
+        -10, 0,   5,   0,   0,   0,   0,   -10,
+        -20, -10, -10, -5,  -5,  -10, -10, -20,
+    ),
+    (
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20,  20,  0,   0,   0,   0,   20,  20,
+        20,  30,  10,  0,   0,   10,  30,  20,
+    ),
+)
+
+
+def _buildSquareScores():
+    #SQUARE_SCORES[code][sq] for mailbox codes colour << 3 | kind (white 0-5, black 8-13). Square sq = y * 8 + x
+    #sits on row 7 - y of the tables above for white, and black uses the same tables mirrored top to bottom.
+    scores = [[0] * 64 for _ in range(14)]
+    for kind, table in enumerate(PIECE_SQUARE_TABLES):
+        for sq in range(64):
+            x, y = sq & 7, sq >> 3
+            scores[kind][sq] = MATERIAL[kind] + table[(7 - y) * 8 + x]
+            scores[8 | kind][sq] = -(MATERIAL[kind] + table[y * 8 + x])
+    return scores
+
+
+SQUARE_SCORES = _buildSquareScores()
+
+
+def evaluatePosition(position):
+    #Full recomputation, only needed to check the incrementally maintained Position.score
+    score = 0
+    for sq in range(64):
+        code = position.board[sq]
+        if code >= 0:
+            score += SQUARE_SCORES[code][sq]
+    return score
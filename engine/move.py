@@ -0,0 +1,43 @@
+from .bitboard import squareName, parseSquare, FEN_LETTERS
+
+#Moves are packed into a single int so move lists hold no per-move objects:
+#   bits 0-5   from square
+#   bits 6-11  to square
+#   bits 12-14 promotion piece kind (0 when the move is not a promotion)
+#   bits 15-17 special move flags (EN_PASSANT, CASTLING, DOUBLE_PUSH)
+NULL_MOVE = 0
+
+
+def encodeMove(fromSq, toSq, flags=0):
+    return fromSq | toSq << 6 | flags
+
+
+def moveFrom(move):
+    return move & 63
+
+
+def moveTo(move):
+    return (move >> 6) & 63
+
+
+def movePromotion(move):
+    return (move >> 12) & 7
+
+
+def moveName(move):
+    #Long algebraic (UCI) notation, e.g. e2e4 or e7e8q
+    name = squareName(moveFrom(move)) + squareName(moveTo(move))
+    if movePromotion(move):
+        name += FEN_LETTERS[movePromotion(move)]
+    return name
+
+
+def parseMove(name, legalMoves):
+    #Find the legal move matching a long algebraic string, or None
+    fromSq = parseSquare(name[0:2])
+    toSq = parseSquare(name[2:4])
+    promotion = FEN_LETTERS.index(name[4].lower()) if len(name) > 4 else 0
+    for move in legalMoves:
+        if moveFrom(move) == fromSq and moveTo(move) == toSq and movePromotion(move) == promotion:
+            return move
+    return None
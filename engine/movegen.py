@@ -0,0 +1,231 @@
+from .bitboard import (WHITE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, FULL, FILE_A, FILE_H, RANK_1, RANK_8,
+                       NO_SQUARE, EN_PASSANT, CASTLING, DOUBLE_PUSH, WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                       BLACK_KINGSIDE, BLACK_QUEENSIDE)
+from .attacks import (KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN, LINE, ROOK_TABLE, ROOK_MASKS,
+                      BISHOP_TABLE, BISHOP_MASKS)
+
+#Legal move generation. Instead of playing each pseudo-legal move and testing whether the king is left in check,
+#the generator works out up front which enemy pieces give check (the checker mask, which also covers the squares
+#a check can be blocked on) and which of our pieces are pinned to the king (each restricted to its pin line).
+#Every target mask is then filtered by those masks, so the moves produced are legal by construction. En passant
+#is the one exception that is verified directly, because it removes two pieces from the same rank.
+
+RANK_2 = 0x000000000000FF00
+RANK_7 = 0x00FF000000000000
+
+PROMOTION_KINDS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+#(right, squares that must be empty, squares the king crosses, king from, king to) for each castling move
+CASTLING_PATHS = ((WHITE_KINGSIDE, 0x60, (5, 6), 4, 6),
+                  (WHITE_QUEENSIDE, 0x0E, (3, 2), 4, 2),
+                  (BLACK_KINGSIDE, 0x60 << 56, (61, 62), 60, 62),
+                  (BLACK_QUEENSIDE, 0x0E << 56, (59, 58), 60, 58))
+
+
+def pawnAttackMask(pawns, colour):
+    #Every square attacked by a set of pawns
+    if colour == WHITE:
+        return (((pawns & ~FILE_A) << 7) | ((pawns & ~FILE_H) << 9)) & FULL
+    return ((pawns & ~FILE_A) >> 9) | ((pawns & ~FILE_H) >> 7)
+
+
+def attackersTo(position, sq, occupied, colour):
+    #Pieces of the given colour attacking sq, with sliders blocked by occupied
+    pieces = position.pieces[colour]
+    return ((PAWN_ATTACKS[colour ^ 1][sq] & pieces[PAWN])
+            | (KNIGHT_ATTACKS[sq] & pieces[KNIGHT])
+            | (KING_ATTACKS[sq] & pieces[KING])
+            | (ROOK_TABLE[sq][occupied & ROOK_MASKS[sq]] & (pieces[ROOK] | pieces[QUEEN]))
+            | (BISHOP_TABLE[sq][occupied & BISHOP_MASKS[sq]] & (pieces[BISHOP] | pieces[QUEEN])))
+
+
+def attackedSquares(position, colour, occupied):
+    #Union of every square attacked by the given colour
+    pieces = position.pieces[colour]
+    attacked = pawnAttackMask(pieces[PAWN], colour)
+
+    bits = pieces[KNIGHT]
+    while bits:
+        low = bits & -bits
+        attacked |= KNIGHT_ATTACKS[low.bit_length() - 1]
+        bits ^= low
+
+    bits = pieces[BISHOP] | pieces[QUEEN]
+    while bits:
+        low = bits & -bits
+        sq = low.bit_length() - 1
+        attacked |= BISHOP_TABLE[sq][occupied & BISHOP_MASKS[sq]]
+        bits ^= low
+
+    bits = pieces[ROOK] | pieces[QUEEN]
+    while bits:
+        low = bits & -bits
+        sq = low.bit_length() - 1
+        attacked |= ROOK_TABLE[sq][occupied & ROOK_MASKS[sq]]
+        bits ^= low
+
+    king = pieces[KING]
+    if king:
+        attacked |= KING_ATTACKS[king.bit_length() - 1]
+    return attacked
+
+
+def isInCheck(position, colour=None):
+    if colour is None:
+        colour = position.sideToMove
+    king = position.pieces[colour][KING]
+    return attackersTo(position, king.bit_length() - 1, position.occupied, colour ^ 1) != 0
+
+
+def _addTargets(moves, fromSq, targets):
+    while targets:
+        low = targets & -targets
+        moves.append(fromSq | (low.bit_length() - 1) << 6)
+        targets ^= low
+
+
+def _addPawnMoves(moves, targets, offset, flags=0):
+    #Pawn moves given as a target mask and the fixed from -> to offset, expanding promotions
+    while targets:
+        low = targets & -targets
+        toSq = low.bit_length() - 1
+        fromSq = toSq - offset
+        if low & (RANK_1 | RANK_8):
+            for kind in PROMOTION_KINDS:
+                moves.append(fromSq | toSq << 6 | kind << 12)
+        else:
+            moves.append(fromSq | toSq << 6 | flags)
+        targets ^= low
+
+
+def generateLegalMoves(position):
+    us = position.sideToMove
+    them = us ^ 1
+    ours = position.pieces[us]
+    theirs = position.pieces[them]
+    own = position.occupancy[us]
+    enemy = position.occupancy[them]
+    occupied = position.occupied
+
+    kingBit = ours[KING]
+    kingSq = kingBit.bit_length() - 1
+    moves = []
+
+    #King moves: the king is removed from the occupancy so it can't hide from a slider behind its own square
+    danger = attackedSquares(position, them, occupied ^ kingBit)
+    _addTargets(moves, kingSq, KING_ATTACKS[kingSq] & ~own & ~danger)
+
+    checkers = attackersTo(position, kingSq, occupied, them)
+    if checkers & (checkers - 1):
+        #Double check: only the king can move
+        return moves
+    if checkers:
+        checkMask = checkers | BETWEEN[kingSq][checkers.bit_length() - 1]
+    else:
+        checkMask = FULL
+
+    #Pinned pieces: enemy sliders that would see the king through exactly one of our pieces
+    pinned = 0
+    pinLines = {}
+    snipers = ((ROOK_TABLE[kingSq][enemy & ROOK_MASKS[kingSq]] & (theirs[ROOK] | theirs[QUEEN]))
+               | (BISHOP_TABLE[kingSq][enemy & BISHOP_MASKS[kingSq]] & (theirs[BISHOP] | theirs[QUEEN])))
+    while snipers:
+        low = snipers & -snipers
+        sniperSq = low.bit_length() - 1
+        blockers = BETWEEN[kingSq][sniperSq] & occupied
+        if blockers and not blockers & (blockers - 1) and blockers & own:
+            pinned |= blockers
+            pinLines[blockers.bit_length() - 1] = LINE[kingSq][sniperSq]
+        snipers ^= low
+
+    targetMask = ~own & checkMask
+
+    #Knights: a pinned knight can never move
+    bits = ours[KNIGHT] & ~pinned
+    while bits:
+        low = bits & -bits
+        sq = low.bit_length() - 1
+        _addTargets(moves, sq, KNIGHT_ATTACKS[sq] & targetMask)
+        bits ^= low
+
+    bits = ours[BISHOP] | ours[QUEEN]
+    while bits:
+        low = bits & -bits
+        sq = low.bit_length() - 1
+        targets = BISHOP_TABLE[sq][occupied & BISHOP_MASKS[sq]] & targetMask
+        if low & pinned:
+            targets &= pinLines[sq]
+        _addTargets(moves, sq, targets)
+        bits ^= low
+
+    bits = ours[ROOK] | ours[QUEEN]
+    while bits:
+        low = bits & -bits
+        sq = low.bit_length() - 1
+        targets = ROOK_TABLE[sq][occupied & ROOK_MASKS[sq]] & targetMask
+        if low & pinned:
+            targets &= pinLines[sq]
+        _addTargets(moves, sq, targets)
+        bits ^= low
+
+    #Pawns: unpinned pawns are generated set-wise by shifting, pinned pawns one at a time along their pin line
+    pawns = ours[PAWN]
+    free = pawns & ~pinned
+    empty = ~occupied & FULL
+    if us == WHITE:
+        single = (free << 8) & empty
+        double = ((single & (RANK_2 << 8)) << 8) & empty
+        _addPawnMoves(moves, single & checkMask, 8)
+        _addPawnMoves(moves, double & checkMask, 16, DOUBLE_PUSH)
+        _addPawnMoves(moves, ((free & ~FILE_A) << 7) & enemy & checkMask, 7)
+        _addPawnMoves(moves, ((free & ~FILE_H) << 9) & enemy & checkMask, 9)
+        push = 8
+    else:
+        single = (free >> 8) & empty
+        double = ((single & (RANK_7 >> 8)) >> 8) & empty
+        _addPawnMoves(moves, single & checkMask, -8)
+        _addPawnMoves(moves, double & checkMask, -16, DOUBLE_PUSH)
+        _addPawnMoves(moves, ((free & ~FILE_A) >> 9) & enemy & checkMask, -9)
+        _addPawnMoves(moves, ((free & ~FILE_H) >> 7) & enemy & checkMask, -7)
+        push = -8
+
+    bits = pawns & pinned
+    while bits:
+        low = bits & -bits
+        sq = low.bit_length() - 1
+        line = pinLines[sq] & checkMask
+        toSq = sq + push
+        if not occupied >> toSq & 1:
+            if line >> toSq & 1:
+                _addPawnMoves(moves, 1 << toSq, push)
+            startRank = RANK_2 if us == WHITE else RANK_7
+            if low & startRank and not occupied >> (toSq + push) & 1 and line >> (toSq + push) & 1:
+                moves.append(sq | (toSq + push) << 6 | DOUBLE_PUSH)
+        captures = PAWN_ATTACKS[us][sq] & enemy & line
+        while captures:
+            capture = captures & -captures
+            _addPawnMoves(moves, capture, (capture.bit_length() - 1) - sq)
+            captures ^= capture
+        bits ^= low
+
+    #En passant: checked by removing both pawns and asking whether the king is then attacked
+    epSquare = position.epSquare
+    if epSquare != NO_SQUARE:
+        capturedSq = epSquare - push
+        bits = PAWN_ATTACKS[them][epSquare] & pawns
+        while bits:
+            low = bits & -bits
+            sq = low.bit_length() - 1
+            after = (occupied ^ low ^ (1 << capturedSq)) | (1 << epSquare)
+            if not attackersTo(position, kingSq, after, them) & ~(1 << capturedSq):
+                moves.append(sq | epSquare << 6 | EN_PASSANT)
+            bits ^= low
+
+    #Castling: never out of check, and never across an attacked square
+    if not checkers and position.castling:
+        for right, emptyMask, crossed, fromSq, toSq in CASTLING_PATHS[us * 2:us * 2 + 2]:
+            if (position.castling & right and not occupied & emptyMask
+                    and not danger >> crossed[0] & 1 and not danger >> crossed[1] & 1):
+                moves.append(fromSq | toSq << 6 | CASTLING)
+
+    return moves
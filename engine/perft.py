@@ -0,0 +1,127 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .bitboard import Position, START_FEN
+from .move import moveName
+from .movegen import generateLegalMoves
+
+#Perft counts every leaf of the legal move tree to a fixed depth. Comparing the totals against the published counts
+#for a handful of tricky positions catches almost any move generation bug, and the time taken is the throughput
+#benchmark for the move generator and the board representation underneath it.
+#Run the suite with `python -m engine.perft`, or `python -m engine.perft --fen "<fen>" --depth 4 --divide`.
+
+#(name, FEN, node counts for depth 1, 2, 3, ...)
+PERFT_SUITE = (
+    ("startpos", START_FEN,
+     (20, 400, 8902, 197281, 4865609)),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     (48, 2039, 97862, 4085603)),
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     (14, 191, 2812, 43238, 674624)),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     (6, 264, 9467, 422333)),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     (44, 1486, 62379, 2103487)),
+    ("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     (46, 2079, 89890, 3894594)),
+)
+
+DEFAULT_SUITE_DEPTH = 3
+
+
+def perft(position, depth):
+    if depth <= 0:
+        return 1
+    moves = generateLegalMoves(position)
+    if depth == 1:
+        #Bulk counting: the leaves don't need to be played
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.makeMove(move)
+        nodes += perft(position, depth - 1)
+        position.unmakeMove()
+    return nodes
+
+
+def _perftRootMove(job):
+    #Process pool worker: positions travel as FEN so the job is cheap to pickle
+    fen, move, depth = job
+    position = Position.fromFen(fen)
+    position.makeMove(move)
+    return move, perft(position, depth - 1)
+
+
+def perftDivide(position, depth, processes=1):
+    #Node counts below each root move, keyed by the move. With processes > 1 the root moves are shared out over a
+    #process pool.
+    moves = generateLegalMoves(position)
+    if processes > 1 and depth > 1:
+        fen = position.fen()
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            return dict(pool.map(_perftRootMove, [(fen, move, depth) for move in moves]))
+
+    divide = {}
+    for move in moves:
+        position.makeMove(move)
+        divide[move] = perft(position, depth - 1)
+        position.unmakeMove()
+    return divide
+
+
+def timedPerft(position, depth, processes=1):
+    #Returns (nodes, seconds, divide)
+    start = time.perf_counter()
+    divide = perftDivide(position, depth, processes)
+    elapsed = time.perf_counter() - start
+    return sum(divide.values()), elapsed, divide
+
+
+def formatRate(nodes, elapsed):
+    return "%d nodes in %.3fs (%d nps)" % (nodes, elapsed, nodes / elapsed if elapsed > 0 else 0)
+
+
+def runSuite(maxDepth=DEFAULT_SUITE_DEPTH, processes=1, out=print):
+    #Runs every suite position to maxDepth (or its deepest known count) and reports correctness and throughput.
+    #Returns True if every count matched.
+    passed = True
+    totalNodes = 0
+    totalTime = 0.0
+    for name, fen, counts in PERFT_SUITE:
+        position = Position.fromFen(fen)
+        for depth in range(1, min(maxDepth, len(counts)) + 1):
+            nodes, elapsed, _ = timedPerft(position, depth, processes)
+            expected = counts[depth - 1]
+            ok = nodes == expected
+            passed = passed and ok
+            totalNodes += nodes
+            totalTime += elapsed
+            out("%-10s depth %d: %s %s" % (name, depth, formatRate(nodes, elapsed),
+                                           "ok" if ok else "FAILED (expected %d)" % expected))
+    out("total: " + formatRate(totalNodes, totalTime))
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft correctness and throughput benchmark for the move generator")
+    parser.add_argument("--fen", help="Run a single position instead of the suite")
+    parser.add_argument("--depth", type=int, default=DEFAULT_SUITE_DEPTH)
+    parser.add_argument("--divide", action="store_true", help="Print the node count below each root move")
+    parser.add_argument("--processes", type=int, default=1, help="Split the work across a process pool by root move")
+    args = parser.parse_args()
+
+    if args.fen:
+        nodes, elapsed, divide = timedPerft(Position.fromFen(args.fen), args.depth, args.processes)
+        if args.divide:
+            for move in sorted(divide, key=moveName):
+                print("%s: %d" % (moveName(move), divide[move]))
+            print("")
+        print(formatRate(nodes, elapsed))
+        return 0
+
+    return 0 if runSuite(args.depth, args.processes) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
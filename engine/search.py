@@ -0,0 +1,253 @@
+import logging
+import time
+
+from .bitboard import WHITE, PAWN, QUEEN, EMPTY, EN_PASSANT
+from .move import moveName
+from .movegen import generateLegalMoves, isInCheck
+from .transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+LOGGER = logging.getLogger(__name__)
+
+#Iterative-deepening principal variation (alpha-beta) search over a ChessBoard. Moves are ordered hash move first,
+#then captures by MVV-LVA, then killer moves, then the history heuristic. Leaves are resolved with a captures-only
+#quiescence search so the static evaluation is never taken in the middle of an exchange. The search stops on a
+#depth, wall-clock or node limit and returns the best move of the deepest completed iteration.
+
+INFINITY = 1000000
+MATE = 100000
+#Scores beyond this are mates, stored in the transposition table relative to the node rather than the root
+MATE_BOUND = MATE - 1000
+MAX_PLY = 128
+#Used when findBestMove is given no limit at all
+DEFAULT_TIME_LIMIT = 1.0
+
+#Move ordering
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORE = 1 << 27
+VICTIM_VALUES = (1, 3, 3, 5, 9, 0)
+
+#How often (in nodes) the clock is read
+CHECK_INTERVAL = 1023
+
+
+class SearchStopped(Exception):
+    pass
+
+
+class Search:
+
+    def __init__(self, board, table=None):
+        self.board = board
+        self.position = board.position
+        self.table = table if table is not None else TranspositionTable()
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.history = [0] * 4096
+        self.nodes = 0
+        self.nodeLimit = None
+        self.deadline = None
+        self.rootBestMove = 0
+
+    def evaluate(self):
+        #ChessBoard.evaluate is from white's point of view; negamax wants the side to move's
+        score = self.board.evaluate()
+        return score if self.position.sideToMove == WHITE else -score
+
+    def checkLimits(self):
+        if self.nodeLimit is not None and self.nodes >= self.nodeLimit:
+            raise SearchStopped()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchStopped()
+
+    def orderMoves(self, moves, ttMove, ply):
+        board = self.position.board
+        killers = self.killers[ply]
+        history = self.history
+        scores = {}
+        for move in moves:
+            toSq = (move >> 6) & 63
+            victim = board[toSq]
+            if move == ttMove:
+                scores[move] = HASH_MOVE_SCORE
+            elif victim != EMPTY or move & EN_PASSANT or (move >> 12) & 7 == QUEEN:
+                victimValue = VICTIM_VALUES[victim & 7] if victim != EMPTY else VICTIM_VALUES[PAWN]
+                if (move >> 12) & 7 == QUEEN:
+                    victimValue += VICTIM_VALUES[QUEEN]
+                scores[move] = CAPTURE_SCORE + victimValue * 8 - (board[move & 63] & 7)
+            elif move == killers[0] or move == killers[1]:
+                scores[move] = KILLER_SCORE
+            else:
+                scores[move] = history[move & 4095]
+        moves.sort(key=scores.__getitem__, reverse=True)
+        return moves
+
+    def quiescence(self, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & CHECK_INTERVAL:
+            self.checkLimits()
+
+        position = self.position
+        if ply >= MAX_PLY:
+            return self.evaluate()
+        inCheck = isInCheck(position)
+        moves = generateLegalMoves(position)
+        if inCheck:
+            #No standing pat in check: every evasion is searched
+            if not moves:
+                return -MATE + ply
+        else:
+            standPat = self.evaluate()
+            if standPat >= beta:
+                return standPat
+            if standPat > alpha:
+                alpha = standPat
+            board = position.board
+            moves = [move for move in moves
+                     if board[(move >> 6) & 63] != EMPTY or move & EN_PASSANT or (move >> 12) & 7 == QUEEN]
+
+        for move in self.orderMoves(moves, 0, ply):
+            position.makeMove(move)
+            score = -self.quiescence(-beta, -alpha, ply + 1)
+            position.unmakeMove()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def negamax(self, depth, alpha, beta, ply):
+        position = self.position
+        if ply and (position.halfmoveClock >= 100 or position.repetitions()):
+            return 0
+
+        inCheck = isInCheck(position)
+        if inCheck and ply < MAX_PLY:
+            #Check extension
+            depth += 1
+        if depth <= 0 or ply >= MAX_PLY:
+            return self.quiescence(alpha, beta, ply)
+
+        self.nodes += 1
+        if not self.nodes & CHECK_INTERVAL:
+            self.checkLimits()
+
+        key = position.key
+        ttMove = 0
+        entry = self.table.probe(key)
+        if entry is not None:
+            ttMove, ttDepth, bound, ttScore = entry
+            if ply and ttDepth >= depth:
+                ttScore = scoreFromTable(ttScore, ply)
+                if bound == EXACT:
+                    return ttScore
+                if bound == LOWER_BOUND and ttScore >= beta:
+                    return ttScore
+                if bound == UPPER_BOUND and ttScore <= alpha:
+                    return ttScore
+
+        moves = generateLegalMoves(position)
+        if not moves:
+            return -MATE + ply if inCheck else 0
+
+        originalAlpha = alpha
+        bestScore = -INFINITY
+        bestMove = 0
+        board = position.board
+        for index, move in enumerate(self.orderMoves(moves, ttMove, ply)):
+            quiet = board[(move >> 6) & 63] == EMPTY and not move & EN_PASSANT and not (move >> 12) & 7
+            position.makeMove(move)
+            if index == 0:
+                score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            else:
+                #Principal variation search: prove the move is no better with a null window first
+                score = -self.negamax(depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta:
+                    score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            position.unmakeMove()
+
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+                if not ply:
+                    self.rootBestMove = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if quiet:
+                            killers = self.killers[ply]
+                            if killers[0] != move:
+                                killers[1] = killers[0]
+                                killers[0] = move
+                            self.history[move & 4095] += depth * depth
+                        break
+
+        if bestScore >= beta:
+            bound = LOWER_BOUND
+        elif bestScore > originalAlpha:
+            bound = EXACT
+        else:
+            bound = UPPER_BOUND
+        self.table.store(key, bestMove, depth, bound, scoreToTable(bestScore, ply))
+        return bestScore
+
+    def search(self, maxDepth=MAX_PLY, timeLimit=None, nodeLimit=None):
+        #Returns (best move, score in centipawns for the side to move). The move is None if there are no legal moves.
+        start = time.perf_counter()
+        self.deadline = start + timeLimit if timeLimit is not None else None
+        self.nodeLimit = nodeLimit
+        self.nodes = 0
+        self.table.newSearch()
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+
+        moves = generateLegalMoves(self.position)
+        if not moves:
+            return None, 0
+
+        bestMove = moves[0]
+        bestScore = 0
+        historyLength = len(self.position.history)
+        for depth in range(1, maxDepth + 1):
+            try:
+                score = self.negamax(depth, -INFINITY, INFINITY, 0)
+            except SearchStopped:
+                #Unwind whatever the interrupted iteration left on the board
+                while len(self.position.history) > historyLength:
+                    self.position.unmakeMove()
+                break
+
+            bestMove = self.rootBestMove
+            bestScore = score
+            LOGGER.info("depth %d score %d nodes %d time %.3fs best %s", depth, score, self.nodes,
+                        time.perf_counter() - start, moveName(bestMove))
+
+            if abs(score) >= MATE_BOUND:
+                break
+            #Another iteration costs several times the last one, so don't start one that can't finish
+            if self.deadline is not None and time.perf_counter() - start > (self.deadline - start) / 2:
+                break
+
+        return bestMove, bestScore
+
+
+def scoreToTable(score, ply):
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def scoreFromTable(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def findBestMove(board, depth=None, timeLimit=None, nodeLimit=None, table=None):
+    #Best move for the side to move on a ChessBoard, within a depth, time (seconds) and/or node budget
+    if depth is None and timeLimit is None and nodeLimit is None:
+        timeLimit = DEFAULT_TIME_LIMIT
+    move, _ = Search(board, table).search(depth or MAX_PLY, timeLimit, nodeLimit)
+    return move
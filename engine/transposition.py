@@ -0,0 +1,91 @@
+#Fixed-size transposition table keyed by Zobrist position keys.
+#
+#The table is two flat lists, one of keys and one of packed entries, divided into buckets of BUCKET_SIZE slots. A
+#position can live in any slot of its bucket. Storing into a full bucket replaces the shallowest entry, preferring
+#entries left over from an earlier search, so the deep (expensive) results survive.
+#
+#Entries are packed into a single int so a store allocates nothing beyond the int itself:
+#   bits 0-17   best move (engine.move encoding)
+#   bits 18-25  depth
+#   bits 26-27  bound type
+#   bits 28-33  generation (search number, for ageing)
+#   bits 34-    score + SCORE_OFFSET
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+BUCKET_SIZE = 4
+#Approximate CPython cost of one slot: two list pointers plus the key and entry int objects
+SLOT_BYTES = 88
+DEFAULT_MEGABYTES = 16
+
+SCORE_OFFSET = 1 << 20
+MAX_DEPTH = 255
+GENERATIONS = 64
+
+
+class TranspositionTable:
+
+    def __init__(self, megabytes=DEFAULT_MEGABYTES):
+        self.bucketCount = max(1, megabytes * 1024 * 1024 // (SLOT_BYTES * BUCKET_SIZE))
+        self.size = self.bucketCount * BUCKET_SIZE
+        self.keys = [0] * self.size
+        self.entries = [0] * self.size
+        self.generation = 0
+
+    def clear(self):
+        self.keys = [0] * self.size
+        self.entries = [0] * self.size
+        self.generation = 0
+
+    def newSearch(self):
+        #Entries written by earlier searches become the first candidates for replacement
+        self.generation = (self.generation + 1) % GENERATIONS
+
+    def probe(self, key):
+        #Returns (move, depth, bound, score) for a stored position, or None
+        start = (key % self.bucketCount) * BUCKET_SIZE
+        keys = self.keys
+        for slot in range(start, start + BUCKET_SIZE):
+            if keys[slot] == key:
+                entry = self.entries[slot]
+                return (entry & 0x3FFFF, (entry >> 18) & 255, (entry >> 26) & 3, (entry >> 34) - SCORE_OFFSET)
+        return None
+
+    def store(self, key, move, depth, bound, score):
+        start = (key % self.bucketCount) * BUCKET_SIZE
+        keys = self.keys
+        entries = self.entries
+        depth = min(max(depth, 0), MAX_DEPTH)
+
+        replace = start
+        replaceValue = None
+        for slot in range(start, start + BUCKET_SIZE):
+            if keys[slot] == key:
+                #Same position: keep the deeper result, but don't lose a best move to a shallower one
+                entry = entries[slot]
+                if depth < (entry >> 18) & 255 and (entry >> 28) & 63 == self.generation:
+                    return
+                if not move:
+                    move = entry & 0x3FFFF
+                replace = slot
+                break
+            if keys[slot] == 0:
+                replace = slot
+                break
+            entry = entries[slot]
+            #Lower is a better victim: shallow entries first, with stale generations counted as much shallower
+            value = (entry >> 18) & 255
+            if (entry >> 28) & 63 != self.generation:
+                value -= MAX_DEPTH + 1
+            if replaceValue is None or value < replaceValue:
+                replace = slot
+                replaceValue = value
+
+        keys[replace] = key
+        entries[replace] = move | depth << 18 | bound << 26 | self.generation << 28 | (score + SCORE_OFFSET) << 34
+
+    def usage(self):
+        #Fraction of slots in use
+        return sum(1 for key in self.keys if key) / self.size
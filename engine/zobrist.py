@@ -0,0 +1,31 @@
+import random
+
+#Zobrist keys: a position's key is the xor of one random 64-bit number per (piece, square), plus keys for the
+#castling rights, the en passant file and the side to move. Position.makeMove updates the key by xoring out what
+#changed, so it never has to be recomputed from the board. The generator is seeded so keys are the same in every
+#process and run, which lets hashes be stored and compared across games.
+
+SEED = 0x5EED
+
+_generator = random.Random(SEED)
+
+#PIECE_KEYS[code][sq] for mailbox codes colour << 3 | kind (codes 6, 7 are unused)
+PIECE_KEYS = [[_generator.getrandbits(64) for _ in range(64)] for _ in range(14)]
+CASTLING_KEYS = [_generator.getrandbits(64) for _ in range(16)]
+EP_FILE_KEYS = [_generator.getrandbits(64) for _ in range(8)]
+SIDE_KEY = _generator.getrandbits(64)
+
+
+def computeKey(position):
+    #Full recomputation, used when a position is set up rather than reached by makeMove
+    key = 0
+    for sq in range(64):
+        code = position.board[sq]
+        if code >= 0:
+            key ^= PIECE_KEYS[code][sq]
+    key ^= CASTLING_KEYS[position.castling]
+    if position.epSquare >= 0:
+        key ^= EP_FILE_KEYS[position.epSquare & 7]
+    if position.sideToMove:
+        key ^= SIDE_KEY
+    return key
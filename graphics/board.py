@@ -1,6 +1,10 @@
 from .graphics import *
+import logging
 import numpy as np
 import cv2
+from engine.bitboard import WHITE
+
+LOGGER = logging.getLogger(__name__)
 
 class Board:
     
@@ -37,7 +41,7 @@ class Board:
         for pieceLoc in boardDict:
             piece = boardDict[pieceLoc]
             if piece.alive:
-                print(piece)
+                LOGGER.debug("Drawing %s", piece)
                 pieceImage = Image(Point((piece.position[0]) * self.h/8 + self.h/8/2, (7 - piece.position[1]) * self.w/8 + self.w/8/2), piece.img)
                 pieceImage.draw(self.win)
 
@@ -91,11 +95,11 @@ class Board:
 
             if newLocationPos == pieceLocation:
                 #If the user selects the selected piece again then we look for new piece to be selected
-                print("Reselect")
+                LOGGER.debug("Reselect")
                 return self.nextMove(origBoardDict, turn)
                 
             elif newLocationPos in validMoves:
-                print("Selected Valid Move")
+                LOGGER.debug("Selected Valid Move")
                 #If there was already a piece there capture it
                 if newLocationPos in boardDict:
                     boardDict[newLocationPos].capture()
@@ -107,9 +111,7 @@ class Board:
                 selectedPiece.position = newLocationPos
                 boardDict[newLocationPos] = selectedPiece
                 
-                print("Updated board dict")
-                print(newLocationPos)
-                print(selectedPiece)
+                LOGGER.debug("Updated board dict: %s moved to %s", selectedPiece, newLocationPos)
                 return boardDict
             
                     
@@ -123,7 +125,7 @@ class Board:
     def evaluate(self, boardDict):
         eval = 0
         for key in boardDict:
-            if boardDict[key].blackwhite == "white":
+            if boardDict[key].colour == WHITE:
                 eval = eval + boardDict[key].value
             else:
                 eval = eval - boardDict[key].value
@@ -1,64 +1,110 @@
+import logging
+from collections import OrderedDict
+
 import cv2
 import numpy as np
 
+LOGGER = logging.getLogger(__name__)
+
+#Rendered board textures kept per display, least recently used dropped first
+TEXTURE_CACHE_SIZE = 64
+
 
 class BoardDisplay:
     background = None
+    #Piece sprites shared by every display, loaded once per image file as (alpha premultiplied colour, 255 - alpha),
+    #both uint16 so a blend is (background * (255 - alpha) + colour * alpha) / 255 in fixed point
+    sprites = {}
 
     def __init__(self, boardImageLoc):
         boardImageBGR = cv2.imread(boardImageLoc)
         boardImageBGR = cv2.resize(boardImageBGR, dsize=(750, 750))
 
-        self.img = boardImageBGR
         self.width = boardImageBGR.shape[1]
         self.height = boardImageBGR.shape[0]
 
-        ones = np.ones((self.height, self.width)) * 255
-        boardImageBGR = np.dstack([boardImageBGR, ones])
-        self.img = boardImageBGR
+        #The empty board is kept so squares can be cleared without reading it from disk again
+        self.background = boardImageBGR
         BoardDisplay.background = boardImageBGR
+        self.img = boardImageBGR.copy()
         self.boardImageLoc = boardImageLoc
 
-    def update(self, boardDict):
-        boardImageBGR = cv2.imread(self.boardImageLoc)
-        boardImageBGR = cv2.resize(boardImageBGR, dsize=(750, 750))
-        ones = np.ones((self.height, self.width)) * 255
-        boardImageBGR = np.dstack([boardImageBGR, ones])
-
-        self.img = boardImageBGR
-
-        print(boardDict)
-
-        for pieceLoc in boardDict:
-            piece = boardDict[pieceLoc]
+        #Sprite file drawn on each (x, y) square, so an update only redraws the squares that changed
+        self.drawn = {}
+
+        #(position key, flip code) -> finished texture, in least to most recently used order
+        self.textures = OrderedDict()
+
+    @classmethod
+    def sprite(cls, pieceImgName):
+        if pieceImgName not in cls.sprites:
+            pieceImg = cv2.imread(pieceImgName, cv2.IMREAD_UNCHANGED).astype(np.uint16)
+            alpha = pieceImg[:, :, 3:4]
+            cls.sprites[pieceImgName] = (pieceImg[:, :, 0:3] * alpha, 255 - alpha)
+        return cls.sprites[pieceImgName]
+
+    def spriteRect(self, location, pieceImgName):
+        #Rows and columns covered by a sprite centred on a square. Every sprite is smaller than a square, so
+        #sprites on different squares never overlap.
+        inImageLoc = (int((7 - location[1]) * self.width / 8 + self.width / 8 / 2),
+                      int((location[0]) * self.height / 8 + self.height / 8 / 2))
+        cutOut, _ = self.sprite(pieceImgName)
+        pieceHeight = cutOut.shape[0]
+        pieceWidth = cutOut.shape[1]
+
+        y1 = int(inImageLoc[0] - pieceHeight / 2)
+        y2 = int(pieceHeight / 2 + inImageLoc[0])
+        x1 = int(inImageLoc[1] - pieceWidth / 2)
+        x2 = int(pieceWidth / 2 + inImageLoc[1])
+        return y1, y2, x1, x2
+
+    def clearSquare(self, location, pieceImgName):
+        y1, y2, x1, x2 = self.spriteRect(location, pieceImgName)
+        self.img[y1:y2, x1:x2] = self.background[y1:y2, x1:x2]
+
+    def drawPiece(self, location, pieceImgName):
+        y1, y2, x1, x2 = self.spriteRect(location, pieceImgName)
+        cutOut, alpha_image = self.sprite(pieceImgName)
+        #At most 255 * 255, so the sum fits in uint16; dividing by 255 is rounded with the usual shift trick
+        blended = self.img[y1:y2, x1:x2] * alpha_image + cutOut + 128
+        self.img[y1:y2, x1:x2] = (blended + (blended >> 8)) >> 8
 
-            inImageLoc = (int((7 - piece.position[1]) * self.width / 8 + self.width / 8 / 2),
-                          int((piece.position[0]) * self.height / 8 + self.height / 8 / 2))
-            pieceImgName = piece.img
-
-            pieceImg = cv2.imread(pieceImgName, cv2.IMREAD_UNCHANGED)
-            pieceHeight = pieceImg.shape[0]
-            pieceWidth = pieceImg.shape[1]
-
-            alpha_image_3 = pieceImg[:, :, 3] / 255.0
-            alpha_image = 1 - alpha_image_3
-
-            for c in range(0, 3):
-                cutOut = (alpha_image_3 * pieceImg[:, :, c])
-                y1 = int(inImageLoc[0] - pieceHeight / 2)
-                y2 = int(pieceHeight / 2 + inImageLoc[0])
-                x1 = int(inImageLoc[1] - pieceWidth / 2)
-                x2 = int(pieceWidth / 2 + inImageLoc[1])
-
-                backgroundImg = (alpha_image * self.img[y1:y2, x1:x2, c])
-
-                overlayedImg = (backgroundImg + cutOut)
-                self.img[y1:y2, x1:x2, c] = overlayedImg
-
-        cv2.imshow("Updating board image", self.img[:, :, 0:3].astype(np.uint8))
+    def update(self, boardDict):
+        LOGGER.debug("Drawing board %s", boardDict)
+
+        pieces = {piece.position: piece.img for piece in boardDict.values()}
+
+        #Clear squares whose piece left or changed, then draw the pieces that are new to their square
+        for location, pieceImgName in self.drawn.items():
+            if pieces.get(location) != pieceImgName:
+                self.clearSquare(location, pieceImgName)
+        for location, pieceImgName in pieces.items():
+            if self.drawn.get(location) != pieceImgName:
+                self.drawPiece(location, pieceImgName)
+        self.drawn = pieces
+
+        cv2.imshow("Updating board image", self.img)
+
+    def texture(self, boardDict, positionKey, flipCode=None):
+        #Board image for a position, ready to show or warp: as drawn when flipCode is None, otherwise flipped with
+        #cv2.flip(img, flipCode). Textures are cached by position key and orientation, so a position seen before is
+        #returned without drawing anything. The texture is shared by the cache and must not be modified.
+        key = (positionKey, flipCode)
+        texture = self.textures.get(key)
+        if texture is not None:
+            self.textures.move_to_end(key)
+            return texture
+
+        self.update(boardDict)
+        texture = self.img.copy() if flipCode is None else cv2.flip(self.img, flipCode)
+        self.textures[key] = texture
+        if len(self.textures) > TEXTURE_CACHE_SIZE:
+            self.textures.popitem(last=False)
+        return texture
 
     def display(self):
-        cv2.imshow("Board Image", self.img.astype(np.uint8))
+        cv2.imshow("Board Image", self.img)
 
     def getDisplayImg(self):
-        return self.img[:, :, 0:3].astype(np.uint8)
\ No newline at end of file
+        #The live BGR buffer, not a copy: it changes on the next update, so copy it to keep a snapshot
+        return self.img
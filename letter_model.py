@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import emnist
+from model_export import export_numpy
 
 def main():
     emnist.ensure_cached_data()
@@ -44,6 +45,9 @@ def main():
     # Save the model for use in main.py
     cnn_model.save('./letter_model.h5', save_format='h5')
 
+    # Export it for the NumPy backend as well, which main.py prefers over the .h5
+    export_numpy('./letter_model.h5')
+
 
 
 
@@ -5,20 +5,17 @@ from pieces.rook import Rook
 from pieces.bishop import Bishop
 from pieces.knight import Knight
 from pieces.queen import Queen
-from board_projection import project_board
-from board_projection import extract_digit
 from chessBoard import ChessBoard
+from diagnostics import configure_logging
 
 
-from graphics.board import Board
 from graphics.boardDisplay import BoardDisplay
-import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
 
 import cv2
 import sys
-import numpy as np
-import tensorflow as tf
+from board_projection import CharacterNotFound
+from recognition import load_models
+from camera_pipeline import CameraPipeline
 
 #Black Pieces
 bp1 = Pawn((0,6),"black")
@@ -70,15 +67,12 @@ boardDict = {wp1.position: wp1, wp2.position: wp2, wp3.position: wp3, wp4.positi
              wkn1.position: wkn1, wkn2.position: wkn2, bkn1.position: bkn1, bkn2.position: bkn2, wk.position: wk, bk.position: bk,
              wq.position: wq, bq.position: bq}
 
-LETTER_DICT: dict = {1: 'A', 2: 'B', 3: 'C', 4: 'D', 5: 'E', 6: 'F', 7: 'G', 8: 'H', 9: 'I', 10: 'J', 11: 'K', 12: 'L', 13: 'M', 14: 'N', 15: 'O', 16: 'P', 17: 'Q', 18: 'R', 19: 'S', 20: 'T', 21: 'U', 22: 'V', 23: 'W', 24: 'X', 25: 'Y', 26: 'Z'}
-
-
+configure_logging()
 
 board = ChessBoard(boardDict)
 
 backgroundLocation = "chessBoardBlank.png"
 boardDisplayer = BoardDisplay(backgroundLocation)
-boardDisplayer.update(board.getBoardDict())
 
 playing = True
 turn = "white"
@@ -94,70 +88,76 @@ if not got_img:
     print("Cannot read video source")
     sys.exit()
 
-board_img = boardDisplayer.getDisplayImg()
+# The board as shown in 2D, and mirrored for projecting onto the camera image
+board_img = boardDisplayer.texture(board.getBoardDict(), board.positionKey())
+projected_board_img = boardDisplayer.texture(board.getBoardDict(), board.positionKey(), flipCode=1)
 
+# Load letter and digit recognition models once, up front
+load_models()
 
-while playing:
+# Capture and processing run on their own threads; this loop only displays results and handles keys
+pipeline = CameraPipeline(video_capture, projected_board_img)
+pipeline.start()
 
-    # Read from the webcam
-    got_img, bgr_img = video_capture.read()
-    # Project the board onto the current image and show it
-    projected_img, h, _ = project_board(bgr_img, cv2.flip(board_img, flipCode=1))
-    cv2.imshow("Chess", projected_img)
-    cv2.imshow("Board in 2D", board_img)
-    cv2.imshow("Camera Feed", bgr_img)
 
-    # Load letter and digit recognition models
-    digit_model = tf.keras.models.load_model("digit_model.h5")
-    letter_model = tf.keras.models.load_model("letter_model.h5")
+while playing:
+
+    # Show the newest processed frame, if one has arrived
+    result = pipeline.latest()
+    if result is not None:
+        projected_img, bgr_img, _, captured = result
+        cv2.imshow("Chess", projected_img)
+        cv2.imshow("Board in 2D", board_img)
+        cv2.imshow("Camera Feed", bgr_img)
+        pipeline.frame_shown(captured)
 
     # Show the image for a millisecond, or exit the loop if a break key was pressed
     key_pressed = cv2.waitKey(1) & 0xFF
     if key_pressed == 27 or key_pressed == ord('q'):
         break
 
-    # If the move key (m) was pressed, make a move
+    # If the move key (m) was pressed, read the move off the whiteboard in the background
     elif key_pressed == ord('m'):
-        startLocation = ['Z', -1]
-        endLocation = ['X', -2]
-        for i in range(4):
-            # Get the reformatted image of the current letter/digit
-            digit, success = extract_digit(bgr_img, i)
-            if not success:
-                # If there was no ArUco marker, just continue
-                print('Could not detect an ArUco marker, please try again')
-                continue
-            if i == 0:
-                # If this is the first letter, store the letter model's prediction in startLocation[0]
-                startLocation[0] = LETTER_DICT[np.argmax(letter_model.predict(digit.reshape(-1, 28, 28, 1))[0, 1:9]) + 1]
-            elif i == 1:
-                # If this is the first digit, store the digit model's prediction in startLocation[1]
-                startLocation[1] = np.argmax(digit_model.predict(digit.reshape(-1, 28, 28, 1))[0, 1:9]) + 1
-            elif i == 2:
-                # If this is the second letter, store the letter model's prediction in endLocation[0]
-                endLocation[0] = LETTER_DICT[np.argmax(letter_model.predict(digit.reshape(-1, 28, 28, 1))[0, 1:9]) + 1]
-            elif i == 3:
-                # If this is the second digit, store the digit model's prediction in endLocation[0]
-                endLocation[1] = np.argmax(digit_model.predict(digit.reshape(-1, 28, 28, 1))[0, 1:9]) + 1
-
-        # Print the predictions to console for debugging purposes
-        print(startLocation)
-        print(endLocation)
-
-        # Attempt to make the move
-        updatedBoard = board.movePiece(startLocation, endLocation, turn)
-
-        # IF the move was successful...
-        if updatedBoard != False:
-
-            # Update the board image and show it
-            boardDisplayer.update(board.getBoardDict())
-            board_img = boardDisplayer.getDisplayImg()
-            cv2.imshow("Updated 2D board", board_img)
-
-            # Switch whose turn it is
-            if turn == "white":
-              turn = "black"
-            elif turn == "black":
-              turn = "white"
-
+        if not pipeline.request_move():
+            print('Still reading the last move, please wait')
+
+    # Once a move has been read, make it
+    recognized = pipeline.recognized_move()
+    if recognized is None:
+        continue
+    if isinstance(recognized, CharacterNotFound):
+        # The marker was found but one of the characters on the whiteboard wasn't, so say which
+        print('%s, please try again' % recognized)
+        continue
+    if isinstance(recognized, Exception):
+        print('Could not read the move (%s), please try again' % recognized)
+        continue
+    startLocation, endLocation, confidence, success = recognized
+    if not success:
+        # If there was no ArUco marker, wait for the next key press
+        print('Could not detect an ArUco marker, please try again')
+        continue
+
+    # Print the predictions to console for debugging purposes
+    print(startLocation)
+    print(endLocation)
+    print('Confidence: %.2f' % confidence)
+
+    # Attempt to make the move
+    updatedBoard = board.movePiece(startLocation, endLocation, turn)
+
+    # IF the move was successful...
+    if updatedBoard != False:
+
+        # Update the board image, show it, and hand it to the pipeline to project
+        board_img = boardDisplayer.texture(board.getBoardDict(), board.positionKey())
+        pipeline.board_img = boardDisplayer.texture(board.getBoardDict(), board.positionKey(), flipCode=1)
+        cv2.imshow("Updated 2D board", board_img)
+
+        # Switch whose turn it is
+        if turn == "white":
+          turn = "black"
+        elif turn == "black":
+          turn = "white"
+
+pipeline.stop()
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+
+import h5py
+import numpy as np
+
+from recognition import MODEL_PATHS, FINGERPRINT_KEY, backend_path, model_fingerprint
+
+# Keras layers the NumPy backend knows how to run, by their saved class name
+LAYER_TYPES: dict = {'Conv2D': 'conv2d', 'MaxPooling2D': 'max_pooling2d', 'Flatten': 'flatten', 'Dense': 'dense'}
+
+# Layers that do nothing at inference time
+SKIPPED_LAYERS: tuple = ('InputLayer', 'Dropout')
+
+
+def read_h5_layers(model_path: str) -> list:
+    # Reads the layer list and weights of a Sequential model saved by model.save(..., save_format='h5'), without TensorFlow
+    # Inputs:
+    #   model_path: The .h5 file
+    # Outputs:
+    #   layers: (class name, config, [weight arrays]) for each layer, in order
+    with h5py.File(model_path, 'r') as model_file:
+        config = model_file.attrs['model_config']
+        config = json.loads(config.decode() if isinstance(config, bytes) else config)
+        weights = model_file['model_weights']
+
+        layers: list = []
+        for layer in config['config']['layers']:
+            arrays = []
+            name = layer['config']['name']
+            if name in weights:
+                group = weights[name]
+                for weight_name in group.attrs.get('weight_names', []):
+                    weight_name = weight_name.decode() if isinstance(weight_name, bytes) else weight_name
+                    arrays.append(group[weight_name][()])
+            layers.append((layer['class_name'], layer['config'], arrays))
+    return layers
+
+
+def export_numpy(model_path: str) -> str:
+    # Converts a Keras .h5 model into the .npz format NumpySession runs
+    # Inputs:
+    #   model_path: The .h5 file
+    # Outputs:
+    #   export_path: The .npz file written next to it, recording the .h5's fingerprint so a stale export can be spotted
+    spec: list = []
+    arrays: dict = {}
+    for class_name, config, weights in read_h5_layers(model_path):
+        if class_name in SKIPPED_LAYERS:
+            continue
+        if class_name not in LAYER_TYPES:
+            raise ValueError("Cannot export %s layers from %s" % (class_name, model_path))
+
+        layer: dict = {'type': LAYER_TYPES[class_name]}
+        if class_name == 'Conv2D':
+            if tuple(config['strides']) != (1, 1) or tuple(config.get('dilation_rate', (1, 1))) != (1, 1):
+                raise ValueError("Only stride 1, undilated convolutions can be exported (%s)" % config['name'])
+            layer['padding'] = config['padding']
+        elif class_name == 'MaxPooling2D':
+            if config['padding'] != 'valid' or tuple(config['strides']) != tuple(config['pool_size']):
+                raise ValueError("Only non-overlapping, valid max pooling can be exported (%s)" % config['name'])
+            layer['pool_size'] = list(config['pool_size'])
+        if class_name in ('Conv2D', 'Dense'):
+            layer['activation'] = config['activation']
+            arrays['kernel_%d' % len(spec)] = weights[0]
+            arrays['bias_%d' % len(spec)] = weights[1] if config['use_bias'] else np.zeros(weights[0].shape[-1], dtype=weights[0].dtype)
+        spec.append(layer)
+
+    export_path = backend_path(model_path, 'numpy')
+    arrays[FINGERPRINT_KEY] = model_fingerprint(model_path)
+    np.savez(export_path, layers=json.dumps(spec), **arrays)
+    return export_path
+
+
+def export_tflite(model_path: str) -> str:
+    # Converts a Keras .h5 model into a TFLite flatbuffer, which needs TensorFlow for the conversion only
+    # Inputs:
+    #   model_path: The .h5 file
+    # Outputs:
+    #   export_path: The .tflite file written next to it
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(tf.keras.models.load_model(model_path))
+    export_path = backend_path(model_path, 'tflite')
+    with open(export_path, 'wb') as export_file:
+        export_file.write(converter.convert())
+    return export_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the recognition models for the lightweight inference backends.")
+    parser.add_argument('models', nargs='*', default=[name for name in MODEL_PATHS if os.path.exists(MODEL_PATHS[name])],
+                        help="Models to export (default: every trained model)")
+    parser.add_argument('--tflite', action='store_true', help="Also convert to TFLite (needs TensorFlow)")
+    args = parser.parse_args()
+
+    for name in args.models:
+        print("Exported " + export_numpy(MODEL_PATHS[name]))
+        if args.tflite:
+            print("Exported " + export_tflite(MODEL_PATHS[name]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,14 @@
+from engine.bitboard import WHITE, BLACK, PAWN
 from .piece import Piece
 
 class Pawn(Piece):
+    __slots__ = ('firstMove',)
 
+    kind = PAWN
     value = 1
 
     def __init__(self, position, blackwhite):
         super().__init__(position, blackwhite)
-        self.img = 'none'
-        if self.blackwhite == 'black':
-            self.img = 'graphics/images/bp_7_13.png'
-        elif self.blackwhite == 'white':
-            self.img = 'graphics/images/wp_13.png'
-        
         self.firstMove = True
 
     def printPiece(self):
@@ -23,7 +20,7 @@ class Pawn(Piece):
     def findValidMoves(self, boardDict):
         validMoves = set()
 
-        if self.blackwhite == "white":
+        if self.colour == WHITE:
             #Check if there is a piece in front of the pawn
             if (self.position[0], self.position[1] + 1) not in boardDict:
                 validMoves.add((self.position[0], self.position[1] + 1))
@@ -36,14 +33,14 @@ class Pawn(Piece):
 
             #Add move diagonally to capture pieces if there is a piece to be captured
             if (self.position[0] + 1, self.position[1] + 1) in boardDict:
-                if boardDict[(self.position[0] + 1, self.position[1] + 1)].blackwhite == "black":
+                if boardDict[(self.position[0] + 1, self.position[1] + 1)].colour == BLACK:
                     validMoves.add((self.position[0] + 1, self.position[1] + 1))
             
             if (self.position[0] - 1, self.position[1] + 1) in boardDict:
-                if boardDict[(self.position[0] - 1, self.position[1] + 1)].blackwhite == "black":
+                if boardDict[(self.position[0] - 1, self.position[1] + 1)].colour == BLACK:
                     validMoves.add((self.position[0] - 1, self.position[1] + 1))
 
-        elif self.blackwhite == "black":
+        elif self.colour == BLACK:
             #Check if there is a piece in front of the pawn
             if (self.position[0], self.position[1] - 1) not in boardDict:
                 validMoves.add((self.position[0], self.position[1] - 1))
@@ -55,11 +52,11 @@ class Pawn(Piece):
                 
             #Add move diagonally to capture pieces if there is a piece to be captured
             if (self.position[0] + 1, self.position[1] - 1) in boardDict:
-                if boardDict[(self.position[0] + 1, self.position[1] - 1)].blackwhite == "white":
+                if boardDict[(self.position[0] + 1, self.position[1] - 1)].colour == WHITE:
                     validMoves.add((self.position[0] + 1, self.position[1] - 1))
             
             if (self.position[0] - 1, self.position[1] - 1) in boardDict:
-                if boardDict[(self.position[0] - 1, self.position[1] - 1)].blackwhite == "white":
+                if boardDict[(self.position[0] - 1, self.position[1] - 1)].colour == WHITE:
                     validMoves.add((self.position[0] - 1, self.position[1] - 1))
 
         return validMoves
\ No newline at end of file
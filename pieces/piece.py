@@ -1,10 +1,38 @@
+from engine.bitboard import WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, COLOUR_NAMES, square, squarePosition, \
+    iterBits
+
+#Sprite for each piece, indexed [colour][kind] and shared by every piece instead of stored on each one
+PIECE_IMAGES = {
+    WHITE: {PAWN: 'graphics/images/wp_13.png', KNIGHT: 'graphics/images/wkn_11.png',
+            BISHOP: 'graphics/images/wb_11.png', ROOK: 'graphics/images/wr_11.png',
+            QUEEN: 'graphics/images/wq_11.png', KING: 'graphics/images/wk_11.png'},
+    BLACK: {PAWN: 'graphics/images/bp_7_13.png', KNIGHT: 'graphics/images/bkn_11.png',
+            BISHOP: 'graphics/images/bb_11.png', ROOK: 'graphics/images/br_11.png',
+            QUEEN: 'graphics/images/bq_11.png', KING: 'graphics/images/bk_6_11.png'},
+}
+
+
 class Piece:
+    #Pieces are small fixed records: no per-instance __dict__, and colour is an int (WHITE/BLACK) so comparisons
+    #are integer compares. Subclasses set kind to their engine.bitboard piece kind.
+    __slots__ = ('position', 'alive', 'colour')
+
     value = 0
+    kind = None
 
     def __init__(self, position, blackwhite):
         self.position = position
         self.alive = True
-        self.blackwhite = blackwhite
+        #Accepts the colour as "white"/"black" or as WHITE/BLACK
+        self.colour = COLOUR_NAMES.index(blackwhite) if isinstance(blackwhite, str) else blackwhite
+
+    @property
+    def blackwhite(self):
+        return COLOUR_NAMES[self.colour]
+
+    @property
+    def img(self):
+        return PIECE_IMAGES[self.colour][self.kind]
 
     def capture(self):
         self.alive = False
@@ -21,6 +49,29 @@ class Piece:
     def findValidMoves(self):
         return
 
+    def occupancy(self, boardDict):
+        #Bitboards of every occupied square and of the squares held by this piece's colour
+        occupied = 0
+        own = 0
+        for location in boardDict:
+            bit = 1 << square(location[0], location[1])
+            occupied |= bit
+            if boardDict[location].colour == self.colour:
+                own |= bit
+        return occupied, own
+
+    def movesFromMask(self, mask):
+        return {squarePosition(sq) for sq in iterBits(mask)}
+
+    def stepMoves(self, attacks, boardDict):
+        #Moves for a leaper from its precomputed attack mask: any empty or enemy-occupied target
+        validMoves = set()
+        for sq in iterBits(attacks):
+            testPos = squarePosition(sq)
+            if testPos not in boardDict or boardDict[testPos].colour != self.colour:
+                validMoves.add(testPos)
+        return validMoves
+
     def validPos(posistion):
         if posistion[0] <= 7 and posistion[0] >= 0 and posistion[1] <= 7 and posistion[1] >= 0:
             return True
@@ -0,0 +1,166 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+import emnist
+from model_export import export_numpy
+from recognition import MODEL_PATHS, INPUT_SHAPE, BACKENDS, backend_path
+
+# EMNIST dataset each recognition model is calibrated and tested on
+DATASETS: dict = {'digit': 'digits', 'letter': 'letters'}
+
+# Only classes 1-8 (A-H and 1-8) are board coordinates, so those are the only ones calibrated and scored
+BOARD_CLASSES: tuple = (1, 9)
+
+# Training samples fed to the TFLite converter to choose activation ranges
+CALIBRATION_SAMPLES: int = 500
+
+# Test samples classified per batch when scoring accuracy; NumpySession's im2col patches for a whole test set at once
+# would need gigabytes
+EVALUATION_BATCH: int = 256
+
+# Test samples each variant is timed on, one at a time as recognize_move would run them
+LATENCY_SAMPLES: int = 200
+
+# Suffix added to the model name for quantized variants, e.g. letter_model.h5 -> letter_model_int8.npz
+INT8_SUFFIX: str = '_int8'
+
+
+def board_samples(name: str, usage: str) -> tuple((np.array, np.array)):
+    # Loads the EMNIST samples for a model, restricted to the board coordinate classes
+    # Inputs:
+    #   name: The registered model name ('digit' or 'letter')
+    #   usage: 'train' or 'test'
+    # Outputs:
+    #   images: (samples, 28, 28) uint8 images
+    #   labels: (samples,) class labels
+    images, labels = emnist.extract_samples(DATASETS[name], usage)
+    mask = np.logical_and(labels >= BOARD_CLASSES[0], labels < BOARD_CLASSES[1])
+    return images[mask], labels[mask]
+
+
+def int8_path(model_path: str, backend: str) -> str:
+    stem, _ = os.path.splitext(model_path)
+    return backend_path(stem + INT8_SUFFIX, backend)
+
+
+def quantize_numpy(model_path: str) -> str:
+    # Writes an int8 copy of a model's NumPy export, with symmetric per-output-channel weight scales
+    # Activations stay float32, so no calibration data is needed; the saving is in model size and load time
+    # Inputs:
+    #   model_path: The .h5 model (exported to .npz first if that hasn't been done)
+    # Outputs:
+    #   export_path: The int8 .npz file
+    float_path = backend_path(model_path, 'numpy')
+    if not os.path.exists(float_path):
+        export_numpy(model_path)
+
+    data = np.load(float_path)
+    arrays: dict = {}
+    for key in data.files:
+        if key.startswith('kernel_'):
+            kernel = data[key]
+            # Every axis but the last (output channels) shares a scale
+            scale = np.abs(kernel.reshape((-1, kernel.shape[-1]))).max(axis=0) / 127
+            scale[scale == 0] = 1
+            arrays[key] = np.round(kernel / scale).astype(np.int8)
+            arrays['kernel_scale_' + key[len('kernel_'):]] = scale.astype(np.float32)
+        else:
+            arrays[key] = data[key]
+
+    export_path = int8_path(model_path, 'numpy')
+    np.savez(export_path, **arrays)
+    return export_path
+
+
+def quantize_tflite(model_path: str, calibration_images: np.array) -> str:
+    # Converts a model to a fully int8 TFLite model, calibrating activation ranges on sample images
+    # The input and output stay float32 so TFLiteSession runs it like any other TFLite model
+    # Inputs:
+    #   model_path: The .h5 model
+    #   calibration_images: (samples, 28, 28) images representative of what the model will see
+    # Outputs:
+    #   export_path: The int8 .tflite file
+    import tensorflow as tf
+
+    def representative_dataset():
+        for image in calibration_images:
+            yield [image.reshape((1,) + INPUT_SHAPE).astype(np.float32)]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(tf.keras.models.load_model(model_path))
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    export_path = int8_path(model_path, 'tflite')
+    with open(export_path, 'wb') as export_file:
+        export_file.write(converter.convert())
+    return export_path
+
+
+def evaluate(session, images: np.array, labels: np.array) -> tuple((float, float)):
+    # Scores a loaded model on board coordinate samples
+    # Inputs:
+    #   session: An InferenceSession
+    #   images, labels: Test samples from board_samples
+    # Outputs:
+    #   accuracy: Fraction of samples whose most likely board class is right
+    #   latency: Mean seconds to classify a single sample
+    probabilities = np.concatenate([session.predict(images[start:start + EVALUATION_BATCH])
+                                    for start in range(0, len(images), EVALUATION_BATCH)])
+    predictions = np.argmax(probabilities[:, BOARD_CLASSES[0]:BOARD_CLASSES[1]], axis=1) + BOARD_CLASSES[0]
+    accuracy = float(np.mean(predictions == labels))
+
+    start = time.perf_counter()
+    for image in images[:LATENCY_SAMPLES]:
+        session.predict(image)
+    latency = (time.perf_counter() - start) / min(len(images), LATENCY_SAMPLES)
+    return (accuracy, latency)
+
+
+def variants(model_path: str) -> list:
+    # Returns (label, backend, file) for every variant of a model that exists on disk
+    found: list = []
+    for backend in BACKENDS:
+        for label, path in (('float32', backend_path(model_path, backend)), ('int8', int8_path(model_path, backend))):
+            if os.path.exists(path):
+                found.append((label, backend, path))
+    return found
+
+
+def report(names: list) -> None:
+    # Prints accuracy, size and latency side by side for every variant of the given models
+    print("%-8s %-8s %-8s %10s %10s %12s" % ("model", "backend", "weights", "accuracy", "size (KB)", "latency (us)"))
+    for name in names:
+        images, labels = board_samples(name, 'test')
+        for label, backend, path in variants(MODEL_PATHS[name]):
+            try:
+                session = BACKENDS[backend](path)
+            except ImportError:
+                # The backend's runtime isn't installed here
+                continue
+            accuracy, latency = evaluate(session, images, labels)
+            print("%-8s %-8s %-8s %9.2f%% %10.1f %12.1f" % (name, backend, label, accuracy * 100, os.path.getsize(path) / 1024, latency * 1e6))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Quantize the recognition models to int8 and compare them with the originals.")
+    parser.add_argument('models', nargs='*', default=list(DATASETS), help="Models to quantize (default: digit and letter)")
+    parser.add_argument('--tflite', action='store_true', help="Also build calibrated int8 TFLite models (needs TensorFlow)")
+    args = parser.parse_args()
+
+    emnist.ensure_cached_data()
+    for name in args.models:
+        print("Quantized " + quantize_numpy(MODEL_PATHS[name]))
+        if args.tflite:
+            calibration_images, _ = board_samples(name, 'train')
+            calibration_images = calibration_images[np.random.default_rng(0).permutation(len(calibration_images))[:CALIBRATION_SAMPLES]]
+            print("Quantized " + quantize_tflite(MODEL_PATHS[name], calibration_images))
+
+    report(args.models)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+
+import numpy as np
+from board_projection import MarkerPose, extract_digit, LETTER_DICT
+
+LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+# Models trained by digit_model.py, letter_model.py and square_model.py, by the name they are registered under
+MODEL_PATHS: dict = {'digit': 'digit_model.h5', 'letter': 'letter_model.h5', 'square': 'square_model.h5'}
+
+# The letter and digit networks take 28x28 single channel images, the same format extract_digit produces
+INPUT_SHAPE: tuple = (28, 28, 1)
+
+# The square network takes a letter and a digit image side by side
+STRIP_SHAPE: tuple = (28, 56, 1)
+MODEL_INPUT_SHAPES: dict = {'square': STRIP_SHAPE}
+
+# The square network has one class per board square, numbered (letter - 1) * 8 + (digit - 1)
+SQUARE_CLASSES: int = 64
+
+# Key under which model_export.py stores the sha256 of the .h5 model a .npz export was made from
+FINGERPRINT_KEY: str = 'source_sha256'
+
+# Whiteboard character indices (as passed to extract_digit) holding the letters and the digits of a move
+LETTER_INDICES: tuple = (0, 2)
+DIGIT_INDICES: tuple = (1, 3)
+
+
+class InferenceSession:
+    # A recognition model that has been loaded and warmed up once and is then kept resident for every prediction
+    # Each backend subclass loads its own file format (extension) and implements run
+
+    extension: str = None
+
+    def __init__(self, model_path: str, input_shape: tuple = INPUT_SHAPE):
+        # Inputs:
+        #   model_path: The model file, in this backend's format
+        #   input_shape: The shape of one input image, including the channel
+        self.model_path: str = model_path
+        self.input_shape: tuple = input_shape
+        self.load(model_path)
+
+        # Run one dummy batch so graph tracing and memory allocation happen now instead of on the first real move
+        self.predict(np.zeros((1,) + input_shape, dtype=np.float32))
+
+    def load(self, model_path: str) -> None:
+        raise NotImplementedError
+
+    def run(self, batch: np.array) -> np.array:
+        # Runs the model on a float32 (batch size,) + input_shape array
+        raise NotImplementedError
+
+    def predict(self, images: np.array) -> np.array:
+        # Runs the model on one or more images
+        # Inputs:
+        #   images: An image or a stack of images, anything that reshapes to (-1,) + input_shape
+        # Outputs:
+        #   probabilities: A (batch size, classes) array of softmax outputs
+        return self.run(images.reshape((-1,) + self.input_shape).astype(np.float32))
+
+
+class KerasSession(InferenceSession):
+    # Runs the trained .h5 model through Keras
+
+    extension: str = '.h5'
+
+    def load(self, model_path: str) -> None:
+        # TensorFlow is imported here rather than at the top so that importing this module (and everything that uses
+        # board_projection or the camera pipeline) doesn't pay its startup cost until a model is actually loaded
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(model_path)
+
+    def run(self, batch: np.array) -> np.array:
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+class TFLiteSession(InferenceSession):
+    # Runs a model converted by model_export.py --tflite, through tflite_runtime if it is installed and TensorFlow if not
+
+    extension: str = '.tflite'
+
+    def load(self, model_path: str) -> None:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.interpreter = Interpreter(model_path=model_path)
+        self.input_index: int = self.interpreter.get_input_details()[0]['index']
+        self.output_index: int = self.interpreter.get_output_details()[0]['index']
+        self.batch_size: int = None
+
+    def run(self, batch: np.array) -> np.array:
+        # The interpreter's tensors have a fixed batch size, so they are only reallocated when it changes
+        if batch.shape[0] != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_size = batch.shape[0]
+        self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index).copy()
+
+
+class NumpySession(InferenceSession):
+    # Runs a model exported by model_export.py with nothing but NumPy
+    # Convolutions are done as one matrix multiply over im2col patches, which for networks this small is faster than
+    # the per-call overhead of any framework
+
+    extension: str = '.npz'
+
+    def load(self, model_path: str) -> None:
+        data = np.load(model_path)
+        self.layers: list = json.loads(str(data['layers']))
+        for index, layer in enumerate(self.layers):
+            if layer['type'] in ('conv2d', 'dense'):
+                kernel = data['kernel_%d' % index].astype(np.float32)
+                # int8 models (see quantize_models.py) store a scale for each output channel alongside the kernel
+                if 'kernel_scale_%d' % index in data.files:
+                    kernel *= data['kernel_scale_%d' % index]
+                # Convolution kernels are flattened in the same (row, column, channel) order the patches are
+                layer['kernel'] = kernel.reshape((-1, kernel.shape[-1]))
+                layer['kernel_size'] = kernel.shape[:2]
+                layer['bias'] = data['bias_%d' % index].astype(np.float32)
+
+    @staticmethod
+    def activate(x: np.array, activation: str) -> np.array:
+        if activation == 'relu':
+            return np.maximum(x, 0, out=x)
+        if activation == 'softmax':
+            x = np.exp(x - x.max(axis=-1, keepdims=True))
+            return x / x.sum(axis=-1, keepdims=True)
+        return x
+
+    def run(self, batch: np.array) -> np.array:
+        x = batch
+        for layer in self.layers:
+            if layer['type'] == 'conv2d':
+                kh, kw = layer['kernel_size']
+                if layer['padding'] == 'same':
+                    x = np.pad(x, ((0, 0), ((kh - 1) // 2, kh // 2), ((kw - 1) // 2, kw // 2), (0, 0)))
+                # (batch, rows, columns, channels, kh, kw) windows, reordered so each patch is (kh, kw, channels)
+                patches = np.lib.stride_tricks.sliding_window_view(x, (kh, kw), axis=(1, 2)).transpose(0, 1, 2, 4, 5, 3)
+                n, h, w = patches.shape[:3]
+                x = np.matmul(patches.reshape((n * h * w, -1)), layer['kernel']) + layer['bias']
+                x = self.activate(x, layer['activation']).reshape((n, h, w, -1))
+            elif layer['type'] == 'max_pooling2d':
+                # Elementwise maximum of the strided views, one per position in the pool window
+                ph, pw = layer['pool_size']
+                h, w = x.shape[1] // ph * ph, x.shape[2] // pw * pw
+                pooled = x[:, 0:h:ph, 0:w:pw]
+                for i in range(ph):
+                    for j in range(pw):
+                        if i or j:
+                            pooled = np.maximum(pooled, x[:, i:h:ph, j:w:pw])
+                x = pooled
+            elif layer['type'] == 'flatten':
+                x = x.reshape((x.shape[0], -1))
+            elif layer['type'] == 'dense':
+                x = self.activate(np.matmul(x, layer['kernel']) + layer['bias'], layer['activation'])
+        return x
+
+
+# Inference backends by name, in the order they are preferred when more than one model format is available
+BACKENDS: dict = {'numpy': NumpySession, 'tflite': TFLiteSession, 'keras': KerasSession}
+
+
+def backend_path(model_path: str, backend: str) -> str:
+    # Returns where a model's file for the given backend lives, e.g. letter_model.h5 -> letter_model.npz
+    return os.path.splitext(model_path)[0] + BACKENDS[backend].extension
+
+
+def model_fingerprint(model_path: str) -> str:
+    # Returns the sha256 of a model file, which identifies its weights however the file was copied or touched
+    with open(model_path, 'rb') as model_file:
+        return hashlib.sha256(model_file.read()).hexdigest()
+
+
+def export_current(model_path: str, backend: str) -> bool:
+    # Returns True if a model's file for the backend exists and was made from the trained .h5 model as it is now, so
+    # a model retrained after its last export is run from the .h5 instead of the export's stale weights
+    # Only .npz exports record the model they came from; .tflite files are trusted as they are, and come after the
+    # .npz (which model_export.py always writes alongside them) in BACKENDS anyway
+    export_path = backend_path(model_path, backend)
+    if not os.path.exists(export_path):
+        return False
+    if backend != 'numpy' or not os.path.exists(model_path):
+        return True
+    with np.load(export_path) as data:
+        return FINGERPRINT_KEY in data.files and str(data[FINGERPRINT_KEY]) == model_fingerprint(model_path)
+
+
+# Sessions that have already been loaded, shared by everything in the process
+_sessions: dict = {}
+
+
+def get_session(name: str, backend: str = None) -> InferenceSession:
+    # Returns the resident session for a model, loading it the first time it is asked for
+    # Inputs:
+    #   name: The registered model name ('digit' or 'letter')
+    #   backend: The backend to load it with, or None for the first in BACKENDS with an up to date model file
+    # Outputs:
+    #   session: The shared InferenceSession for that model
+    if name not in _sessions:
+        model_path = MODEL_PATHS[name]
+        if backend is None:
+            backend = next((candidate for candidate in BACKENDS if export_current(model_path, candidate)), 'keras')
+            if backend == 'keras' and importlib.util.find_spec('tensorflow') is None:
+                # The .h5 can't be loaded here, so an out of date export is better than nothing
+                backend = next((candidate for candidate in BACKENDS if candidate != 'keras' and os.path.exists(backend_path(model_path, candidate))), None)
+                if backend is None:
+                    raise ImportError("%s has no exported model file and TensorFlow isn't installed to load it; "
+                                      "export it with model_export.py" % model_path)
+                LOGGER.warning("%s has changed since it was exported, but TensorFlow isn't installed to load it, so the "
+                               "old %s export is used; rerun model_export.py to update it", model_path, backend)
+        _sessions[name] = BACKENDS[backend](backend_path(model_path, backend), MODEL_INPUT_SHAPES.get(name, INPUT_SHAPE))
+    return _sessions[name]
+
+
+def model_available(name: str) -> bool:
+    # Returns True if a model has been trained (or exported) in a format any backend can load
+    return any(os.path.exists(backend_path(MODEL_PATHS[name], backend)) for backend in BACKENDS)
+
+
+def move_models() -> tuple:
+    # Returns the models recognize_move uses: the joint square model once it has been trained, letter and digit until then
+    return ('square',) if model_available('square') else ('letter', 'digit')
+
+
+def load_models(names: tuple = None, backend: str = None) -> None:
+    # Loads and warms up models ahead of time (by default the ones recognize_move uses), so startup pays for it rather than the first frame
+    for name in names or move_models():
+        get_session(name, backend)
+
+
+def recognize_move(img: np.array, pose: MarkerPose = None) -> tuple((list, list, float, bool)):
+    # Reads a whole move (e.g. E2 E4) off the whiteboard in one step
+    # With the square model, each square's letter and digit are read together as one strip and both squares go through
+    # in a single forward pass. Otherwise both letters go through the letter model as one batch and both digits through
+    # the digit model as another.
+    # Inputs:
+    #   img: The camera image of the whiteboard
+    #   pose: The marker pose already found in img, detected here if not given
+    # Outputs:
+    #   startLocation: [letter, digit] of the square to move from, e.g. ['E', 2]
+    #   endLocation: [letter, digit] of the square to move to
+    #   confidence: The probability the models gave their least certain reading, from 0 to 1
+    #   success: A boolean that is False if there was no ArUco marker to find the characters from
+    # Raises CharacterNotFound (from extract_digit) if one of the four characters' cells is empty
+
+    # All four characters are located from the same marker detection
+    if pose is None:
+        pose = MarkerPose(img)
+    crops: list = []
+    for index in LETTER_INDICES + DIGIT_INDICES:
+        crop, success = extract_digit(img, index, pose)
+        if not success:
+            return (None, None, 0.0, False)
+        crops.append(crop)
+
+    if 'square' in move_models():
+        # Each square's letter and digit side by side, one strip per square
+        strips = np.concatenate((np.stack(crops[:2]), np.stack(crops[2:])), axis=2)
+        probabilities = get_session('square').predict(strips)
+        squares = np.argmax(probabilities, axis=1)
+        letters, digits = squares // 8 + 1, squares % 8 + 1
+        confidence = float(np.min(np.max(probabilities, axis=1)))
+    else:
+        # Only classes 1-8 (A-H and 1-8) are valid board coordinates
+        letter_probabilities = get_session('letter').predict(np.stack(crops[:2]))[:, 1:9]
+        digit_probabilities = get_session('digit').predict(np.stack(crops[2:]))[:, 1:9]
+        letters = np.argmax(letter_probabilities, axis=1) + 1
+        digits = np.argmax(digit_probabilities, axis=1) + 1
+        confidence = float(min(np.max(letter_probabilities, axis=1).min(), np.max(digit_probabilities, axis=1).min()))
+
+    startLocation: list = [LETTER_DICT[letters[0]], int(digits[0])]
+    endLocation: list = [LETTER_DICT[letters[1]], int(digits[1])]
+    return (startLocation, endLocation, confidence, True)
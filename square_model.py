@@ -0,0 +1,77 @@
+import tensorflow as tf
+import numpy as np
+import emnist
+from model_export import export_numpy
+
+# Number of letter/digit pairs to build from the EMNIST samples for training and testing
+N_TRAIN_PAIRS = 200000
+N_TEST_PAIRS = 20000
+
+
+def make_pairs(letters, letter_labels, digits, digit_labels, n_pairs, rng):
+    # Builds square name images by putting a random letter (A-H) beside a random digit (1-8)
+    # Inputs:
+    #   letters, letter_labels: EMNIST letter images and their labels (1-8)
+    #   digits, digit_labels: EMNIST digit images and their labels (1-8)
+    #   n_pairs: How many strips to make
+    #   rng: The numpy random generator to draw pairs with
+    # Outputs:
+    #   strips: (n_pairs, 28, 56) images, letter on the left
+    #   squares: (n_pairs,) square classes, (letter - 1) * 8 + (digit - 1)
+    letter_index = rng.integers(len(letters), size=n_pairs)
+    digit_index = rng.integers(len(digits), size=n_pairs)
+    strips = np.concatenate((letters[letter_index], digits[digit_index]), axis=2)
+    squares = (letter_labels[letter_index] - 1) * 8 + (digit_labels[digit_index] - 1)
+    return strips, squares
+
+
+def load_pairs(usage, n_pairs, rng):
+    # Loads EMNIST letters A-H and digits 1-8 for the given usage ('train' or 'test') and pairs them up
+    letters, letter_labels = emnist.extract_samples('letters', usage)
+    letter_mask = np.logical_and(letter_labels > 0, letter_labels < 9)
+    digits, digit_labels = emnist.extract_samples('digits', usage)
+    digit_mask = np.logical_and(digit_labels > 0, digit_labels < 9)
+    return make_pairs(letters[letter_mask], letter_labels[letter_mask], digits[digit_mask], digit_labels[digit_mask], n_pairs, rng)
+
+
+def main():
+    emnist.ensure_cached_data()
+    rng = np.random.default_rng(0)
+
+    # Build letter + digit strips for every square of the board
+    (x_train, y_train) = load_pairs('train', N_TRAIN_PAIRS, rng)
+    (x_test, y_test) = load_pairs('test', N_TEST_PAIRS, rng)
+
+    # Convert y_train and y_test to categorical, one class per square
+    y_train = tf.keras.utils.to_categorical(y_train, 64)
+    y_test = tf.keras.utils.to_categorical(y_test, 64)
+
+    # Set up CNN architecture: the same convolutional backbone as the letter and digit models, over both characters at once
+    cnn_layers = []
+    cnn_layers.append(tf.keras.Input(shape=(28, 56, 1)))
+    cnn_layers.append(tf.keras.layers.Conv2D(16, 3, padding='same', activation='relu'))
+    cnn_layers.append(tf.keras.layers.MaxPool2D())
+    cnn_layers.append(tf.keras.layers.Conv2D(32, 3, padding='same', activation='relu'))
+    cnn_layers.append(tf.keras.layers.MaxPool2D())
+    cnn_layers.append(tf.keras.layers.Flatten())
+    cnn_layers.append(tf.keras.layers.Dense(128, activation='relu'))
+    cnn_layers.append(tf.keras.layers.Dropout(0.15))
+    cnn_layers.append(tf.keras.layers.Dense(64, activation='softmax'))
+
+    # Define model based on that architecture
+    cnn_model = tf.keras.Sequential(cnn_layers)
+
+    # Compile and train model
+    cnn_model.compile(optimizer="adam", loss='categorical_crossentropy', metrics=['accuracy'])
+    n_epochs = 10
+    history = cnn_model.fit(x_train.reshape(-1, 28, 56, 1), y_train, epochs=n_epochs, validation_data=(x_test.reshape(-1, 28, 56, 1), y_test))
+
+    # Save the model for use in main.py
+    cnn_model.save('./square_model.h5', save_format='h5')
+
+    # Export it for the NumPy backend as well, which main.py prefers over the .h5
+    export_numpy('./square_model.h5')
+
+
+if __name__ == "__main__":
+    main()